@@ -8,6 +8,7 @@ import pandas as pd
 from misc.file_util import load_configs, load_expressions
 from misc.file_util import load_space, save_languages
 from modals.modal_language import ModalExpression, ModalLanguage
+from modals.modal_language_of_thought import ModalLOT
 from modals.modal_meaning import ModalMeaning, ModalMeaningPoint
 
 
@@ -105,6 +106,13 @@ def main():
     expressions = load_expressions(expression_save_fn)
     space = load_space(space_fn)
 
+    # index recorded expressions by the meaning bitmask their formula denotes
+    mlot = ModalLOT(space, configs["language_of_thought"])
+    expression_index = {
+        mlot.formula_to_bitmask(expression.lot_expression): expression
+        for expression in expressions
+    }
+
     # Construct ModalLanguages for each natural language
     experiment_languages = []
     for language_name, data_dict in dataframes.items():
@@ -145,14 +153,17 @@ def main():
                 ],
                 meaning_space=space,
             )
-            # search for a matching recorded meaning to reuse LoT solutions
-            for expression in expressions:
-                if expression.meaning == meaning:
-                    experiment_modal = ModalExpression(
-                        form, meaning, expression.lot_expression
-                    )
-                    experiment_vocabulary.append(experiment_modal)
-                    break
+            # look up the recorded meaning to reuse LoT solutions
+            expression = expression_index.get(meaning.to_bitmask())
+            if expression is not None:
+                experiment_modal = ModalExpression(
+                    form,
+                    meaning,
+                    expression.lot_expression,
+                    expression.complexity,
+                    expression.histogram,
+                )
+                experiment_vocabulary.append(experiment_modal)
         lang = ModalLanguage(expressions=experiment_vocabulary, name=language_name)
         lang.natural = True
         # lang.data["family"] = family
@@ -1,12 +1,32 @@
 """Script for estimating the pareto frontier of languages optimizing the simplicity/informativeness trade-off, and robust exploration of the 2D space of possible modal languages."""
 
+import os
 import random
 import sys
+import numpy as np
+from functools import partial
 from altk.effcomm.optimization import EvolutionaryOptimizer
 from misc import file_util
+from misc.language_store import LanguageStore
+from misc.reservoir import StratifiedReservoir
 from modals.modal_language_of_thought import ModalLOT
-from modals.modal_language import ModalLanguage
-from modals.modal_measures import language_complexity
+from modals.modal_language import (
+    ModalExpression,
+    ModalExpressionIndex,
+    ModalLanguage,
+)
+from modals.modal_measures import (
+    language_complexity,
+    item_complexities,
+    LanguageMeasureMemo,
+)
+from modals.modal_optimization import VectorizedModalOptimizer
+from modals.modal_coverage import CoverageModalOptimizer
+from modals.modal_local_search import (
+    LocalSearchModalOptimizer,
+    METHODS as LOCAL_SEARCH_METHODS,
+)
+from modals.modal_pareto import ParetoArchive
 from sample_languages import generate_languages
 from modals.modal_mutations import (
     Add_Modal,
@@ -16,12 +36,239 @@ from modals.modal_mutations import (
     Interchange_Modal,
 )
 from altk.effcomm.informativity import informativity
+from multiprocess import Pool
+
+
+def fit_direction(
+    optimizer: EvolutionaryOptimizer,
+    memo: LanguageMeasureMemo,
+    x: str,
+    y: str,
+    seed: int,
+    seed_population: list[ModalLanguage],
+    id_start: int,
+    explore: float,
+    explored_fn: str,
+    checkpoint_fn: str = None,
+    checkpoint_every: int = 0,
+    resume: bool = False,
+) -> dict:
+    """Run the evolutionary algorithm for one direction of optimization in a worker process.
+
+    Args:
+        optimizer: the EvolutionaryOptimizer, pickled to the worker along with its objectives and mutations
+
+        memo: the memo of measures used by the optimizer's objectives, whose hits and misses are reported after fitting. In a Pool worker, this is the worker's own copy.
+
+        x: the first objective to minimize, e.g. 'comm_cost'
+
+        y: the second objective to minimize, e.g. 'complexity'
+
+        seed: the random seed of this direction's run
+
+        seed_population: the languages of the first generation
+
+        id_start: the first language id for this run to use
+
+        explore: the fraction of parents sampled from all explored languages
+
+        explored_fn: the file to store this direction's distinct explored languages in, for the parent process to read back one at a time
+
+        checkpoint_fn: the file to save this direction's checkpoints to, if the optimizer supports checkpoints
+
+        checkpoint_every: the number of generations between checkpoints, or 0 for none
+
+        resume: whether to continue from the checkpoint in checkpoint_fn
+
+    Returns:
+        the result of optimizer.fit, with the number of distinct explored languages as "num_explored" in place of the "explored_languages", which are in the store at explored_fn with their comm_cost and complexity in their data
+    """
+    file_util.set_seed(seed)
+    optimizer.x = x
+    optimizer.y = y
+    print(f"Minimizing for {x}, {y} ...")
+    hits, misses = memo.hits, memo.misses
+    store = LanguageStore(explored_fn, optimizer.expressions[0].meaning.universe)
+
+    def explored(lang: ModalLanguage) -> None:
+        # measure the points of the languages the optimizer left unmeasured here, so that the parent process does not measure every language again serially
+        for name in ("comm_cost", "complexity"):
+            if lang.data.get(name) is None:
+                lang.data[name] = optimizer.objectives[name](lang)
+        store.add(lang)
+
+    # the vectorized optimizers pass each language to the store as they build it; altk's returns them all
+    optimizer.on_explored = explored
+    kwargs = {}
+    if checkpoint_fn is not None:
+        kwargs = {
+            "checkpoint_fn": checkpoint_fn,
+            "checkpoint_every": checkpoint_every,
+            "resume": resume,
+        }
+        if resume and os.path.exists(checkpoint_fn):
+            print(f"Resuming {x}, {y} from {checkpoint_fn}")
+    result = optimizer.fit(
+        seed_population=seed_population,
+        id_start=id_start,
+        explore=explore,
+        **kwargs,
+    )
+    optimizer.on_explored = None
+    for lang in result.pop("explored_languages"):
+        explored(lang)
+    store.close()
+    result["num_explored"] = len(store)
+    print(
+        f"Finished {x}, {y}: {memo.hits - hits} memo hits, {memo.misses - misses} misses; {memo}"
+    )
+    if "generations" in result:
+        print(f"{x}, {y} ran for {result['generations']} generations")
+    return result
+
+
+def fit_direction_task(task: tuple) -> dict:
+    """Call fit_direction with the arguments in a task tuple, for Pool.imap."""
+    return fit_direction(*task)
+
+
+def warm_start_languages(
+    fns: list[str], expressions: list[ModalExpression], lang_size: int
+) -> list[ModalLanguage]:
+    """Load the distinct languages of previous runs' language files, e.g. their dominant and explored languages, to seed a new run.
+
+    Languages are rebuilt from the current expressions by meaning, so that they are measured and mutated as this run's languages are. Languages of another meaning space, with a meaning none of the expressions have, or with more than lang_size expressions are skipped, e.g. after changing the space or the maximum language size.
+
+    Args:
+        fns: the .yml files to load languages from. Files that do not exist are skipped.
+
+        expressions: the expressions of this run
+
+        lang_size: the maximum number of expressions in a language
+
+    Returns:
+        a list of the distinct languages of each file in turn, each file's languages shuffled, so that earlier files take precedence when the list is truncated.
+    """
+    space = expressions[0].meaning.universe
+    by_bitmask = {e.meaning.to_bitmask(): e for e in expressions}
+    seen = set()
+    languages = []
+    for fn in fns:
+        if not os.path.exists(fn):
+            print(f"No languages to warm start from in {fn}")
+            continue
+        loaded = file_util.load_languages(fn)["languages"]
+        random.shuffle(loaded)
+        for lang in loaded:
+            universe = lang.expressions[0].meaning.universe
+            if (universe.forces, universe.flavors) != (space.forces, space.flavors):
+                continue
+            fingerprint = lang.fingerprint()
+            if len(fingerprint) > lang_size or fingerprint in seen:
+                continue
+            if any(mask not in by_bitmask for mask in fingerprint):
+                continue
+            seen.add(fingerprint)
+            languages.append(ModalLanguage([by_bitmask[m] for m in fingerprint]))
+    return languages
+
+
+def altk_optimizer(
+    params: dict, complexities: np.ndarray, configs: dict, memo: LanguageMeasureMemo
+) -> EvolutionaryOptimizer:
+    """altk's EvolutionaryOptimizer, with the modals-specific mutations."""
+    index = ModalExpressionIndex(params["expressions"])
+    mutations = [
+        Add_Modal(index),
+        Remove_Modal(),
+        Remove_Point(index),
+        Add_Point(index),
+        Interchange_Modal(index),
+    ]
+    return EvolutionaryOptimizer(mutations=mutations, **params)
+
+
+def vectorized_params(
+    complexities: np.ndarray, configs: dict, memo: LanguageMeasureMemo
+) -> dict:
+    """The parameters shared by the optimizers extending VectorizedModalOptimizer: the item complexities, the memo, and the patience and tolerance of convergence."""
+    convergence = configs.get("convergence", {})
+    return {
+        "item_complexities": complexities,
+        "memo": memo,
+        "patience": convergence.get("patience", 0),
+        "tolerance": convergence.get("tolerance", 0.0),
+    }
+
+
+def vectorized_optimizer(
+    params: dict, complexities: np.ndarray, configs: dict, memo: LanguageMeasureMemo
+) -> VectorizedModalOptimizer:
+    """Mutates whole generations as integer matrices, with complexity batched over item complexities."""
+    return VectorizedModalOptimizer(
+        **params, **vectorized_params(complexities, configs, memo)
+    )
+
+
+def pygmo_optimizer(
+    params: dict, complexities: np.ndarray, configs: dict, memo: LanguageMeasureMemo
+) -> VectorizedModalOptimizer:
+    """An archipelago of NSGA-II islands, one process per island."""
+    try:
+        from modals.modal_archipelago import ArchipelagoModalOptimizer
+    except ModuleNotFoundError as e:
+        if e.name != "pygmo":
+            raise
+        raise ModuleNotFoundError(
+            "The pygmo optimizer needs pygmo (see environment.yml), e.g. conda install -c conda-forge pygmo."
+        ) from e
+
+    return ArchipelagoModalOptimizer(
+        **params,
+        **vectorized_params(complexities, configs, memo),
+        islands=configs.get("islands", configs["num_processes"]),
+        migration_every=configs.get("migration_every", 10),
+    )
+
+
+def local_search_optimizer(
+    params: dict,
+    complexities: np.ndarray,
+    configs: dict,
+    memo: LanguageMeasureMemo,
+    method: str,
+) -> VectorizedModalOptimizer:
+    """Walkers descending weighted sums of the two objectives from the seed languages, by hill climbing, simulated annealing or tabu search."""
+    local_search = configs.get("local_search", {})
+    return LocalSearchModalOptimizer(
+        **params,
+        **vectorized_params(complexities, configs, memo),
+        method=method,
+        neighbours=local_search.get("neighbours", 8),
+        temperature=local_search.get("temperature", 0.05),
+        tabu_size=local_search.get("tabu_size", 10),
+    )
+
+
+# The optimizers selectable by evolutionary_alg.optimizer, each built from the parameters shared with altk's EvolutionaryOptimizer, the complexity of each expression, the evolutionary_alg configs and the memo of measures
+OPTIMIZERS = {
+    "altk": altk_optimizer,
+    "vectorized": vectorized_optimizer,
+    "pygmo": pygmo_optimizer,
+    **{
+        method: partial(local_search_optimizer, method=method)
+        for method in LOCAL_SEARCH_METHODS
+    },
+}
 
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python3 src/estimate_pareto_frontier.py path_to_config_file")
-        raise TypeError(f"Expected {2} arguments but received {len(sys.argv)}.")
+    if len(sys.argv) not in [2, 3] or sys.argv[2:] not in [[], ["--resume"]]:
+        print(
+            "Usage: python3 src/estimate_pareto_frontier.py path_to_config_file [--resume]"
+        )
+        raise TypeError(f"Expected {2} or {3} arguments but received {len(sys.argv)}.")
+    resume = len(sys.argv) == 3
 
     print("Estimating pareto frontier ...")
 
@@ -32,6 +279,14 @@ def main():
     prior_fn = configs["file_paths"]["prior"]
     artificial_langs_fn = configs["file_paths"]["artificial_languages"]
     dom_langs_fn = configs["file_paths"]["dominant_languages"]
+    natural_langs_fn = configs["file_paths"]["natural_languages"]
+    store_fn = configs["file_paths"].get(
+        "explored_store",
+        os.path.join(os.path.dirname(artificial_langs_fn), "explored_languages.jsonl"),
+    )
+    checkpoints_dir = configs["file_paths"].get(
+        "checkpoints", os.path.join(os.path.dirname(artificial_langs_fn), "checkpoints")
+    )
 
     # Load optimization params
     evolutionary_alg_configs = configs["evolutionary_alg"]
@@ -42,6 +297,11 @@ def main():
     processes = evolutionary_alg_configs["num_processes"]
     lang_size = evolutionary_alg_configs["maximum_lang_size"]
     explore = evolutionary_alg_configs["explore"]
+    optimizer_name = evolutionary_alg_configs.get("optimizer", "altk")
+    checkpoint_every = evolutionary_alg_configs.get("checkpoint_every", 0)
+    convergence = evolutionary_alg_configs.get("convergence", {})
+    coverage = evolutionary_alg_configs.get("coverage", {})
+    warm_start = evolutionary_alg_configs.get("warm_start", {})
 
     file_util.set_seed(configs["random_seed"])
 
@@ -52,25 +312,39 @@ def main():
     sampled_languages = result["languages"]
     id_start = result["id_start"]
 
-    print("Sampling seed generation...")
     expressions = file_util.load_expressions(expressions_fn)
-    result = generate_languages(
-        language_class=ModalLanguage,
-        expressions=expressions,
-        lang_size=lang_size,
-        sample_size=sample_size,
-        id_start=id_start,
-    )
-    seed_population = result["languages"]
-    id_start = result["id_start"]
+    # Optionally seed part of the first generation with a previous run's languages, so that re-runs start near its frontier
+    seed_population = []
+    if warm_start.get("files"):
+        print("Loading warm start languages...")
+        warm = warm_start_languages(warm_start["files"], expressions, lang_size)
+        seed_population = warm[: int(warm_start.get("fraction", 0.5) * sample_size)]
+        for lang in seed_population:
+            id_start += 1
+            lang.data["name"] = f"sampled_lang_{id_start}"
+        print(f"Warm starting from {len(seed_population)} languages.")
+
+    print("Sampling seed generation...")
+    if len(seed_population) < sample_size:
+        result = generate_languages(
+            language_class=ModalLanguage,
+            expressions=expressions,
+            lang_size=lang_size,
+            sample_size=sample_size - len(seed_population),
+            id_start=id_start,
+        )
+        seed_population += result["languages"]
+        id_start = result["id_start"]
 
     # construct measures of complexity and informativity as optimization objectives
     space = file_util.load_space(space_fn)
     prior = space.prior_to_array(file_util.load_prior(prior_fn))
 
+    mlot = ModalLOT(space, configs["language_of_thought"])
     complexity_measure = lambda lang: language_complexity(
         language=lang,
-        mlot=ModalLOT(space, configs["language_of_thought"]),
+        mlot=mlot,
+        weights=configs.get("complexity_weights"),
     )
 
     informativity_measure = lambda lang: informativity(
@@ -80,6 +354,12 @@ def main():
         agent_type=agent_type,
     )
 
+    # the complexity of each expression, and the highest complexity of a language, bounding the trade-off plane
+    complexities = item_complexities(
+        expressions, mlot, configs.get("complexity_weights")
+    )
+    max_complexity = np.sort(complexities)[-lang_size:].sum()
+
     # Use optimizer as an exploration / sampling method as follows:
     # estimate FOUR pareto frontiers using the evolutionary algorithm; one for each corner of the 2D space of possible langs
     directions = {
@@ -88,76 +368,177 @@ def main():
         "upper_left": ("comm_cost", "simplicity"),
         "upper_right": ("informativity", "simplicity"),
     }
+    # the objectives share one bounded memo, so each measure is computed once per distinct language in each process. Pool workers each get their own copy, so directions run in parallel do not share measures; sharing it across processes would cost a round trip to a manager process on every lookup.
+    memo = LanguageMeasureMemo(
+        {"informativity": informativity_measure, "complexity": complexity_measure},
+        maxsize=evolutionary_alg_configs.get("memo_size", 100000),
+    )
     objectives = {
-        "comm_cost": lambda lang: 1 - informativity_measure(lang),
-        "informativity": informativity_measure,
-        "complexity": complexity_measure,
+        "comm_cost": lambda lang: 1 - memo("informativity", lang),
+        "informativity": lambda lang: memo("informativity", lang),
+        "complexity": lambda lang: memo("complexity", lang),
         "simplicity": lambda lang: 1
-        / complexity_measure(
-            lang
+        / memo(
+            "complexity", lang
         ),  # this is different from the simplicity value computed during analysis. The data['simplicity'] field will be reset to None before then, in measure_tradeoff.
     }
 
-    # Load modals-specifc mutations
-    mutations = [
-        Add_Modal(),
-        Remove_Modal(),
-        Remove_Point(),
-        Add_Point(),
-        Interchange_Modal(),
-    ]
-
     # Initialize optimizer
-    optimizer = EvolutionaryOptimizer(
-        objectives=objectives,
-        expressions=expressions,
-        mutations=mutations,
-        sample_size=sample_size,
-        max_mutations=max_mutations,
-        generations=generations,
-        lang_size=lang_size,
-    )
-
-    # Explore all four corners of the possible language space
-    results = {k: None for k in directions}
-    pool = []
-    for direction in directions:
-        # set directions of optimization
-        x, y = directions[direction]
-        optimizer.x = x
-        optimizer.y = y
-        print(f"Minimizing for {x}, {y} ...")
-
-        # run algorithm
-        result = optimizer.fit(
-            seed_population=seed_population,
-            id_start=id_start,
-            explore=explore,
+    if optimizer_name not in OPTIMIZERS:
+        raise ValueError(
+            f"Unknown optimizer '{optimizer_name}'; expected one of {list(OPTIMIZERS)}."
         )
+    params = {
+        "objectives": objectives,
+        "expressions": expressions,
+        "sample_size": sample_size,
+        "max_mutations": max_mutations,
+        "generations": generations,
+        "lang_size": lang_size,
+    }
+    optimizer = OPTIMIZERS[optimizer_name](
+        params, complexities, evolutionary_alg_configs, memo
+    )
 
-        # collect results
-        results[direction] = result
-        id_start = result["id_start"]
-        pool.extend(results[direction]["explored_languages"])
+    if convergence.get("patience") and optimizer_name == "altk":
+        raise ValueError(
+            "Stopping at convergence requires an optimizer other than altk."
+        )
 
-    # the Pareto langs for the complexity/comm_cost trade-off.
-    dominant_langs = results["lower_left"]["dominating_languages"]
+    # Optionally fill the interior of the trade-off plane with a fifth run, which breeds from and mutates towards its sparsely explored cells until they are covered
+    optimizers = {direction: optimizer for direction in directions}
+    if coverage.get("bins"):
+        directions["coverage"] = ("comm_cost", "complexity")
+        optimizers["coverage"] = CoverageModalOptimizer(
+            **params,
+            item_complexities=complexities,
+            memo=memo,
+            bounds=[(0.0, 1.0), (0.0, float(max_complexity))],
+            bins=coverage["bins"],
+            per_cell=coverage.get("per_cell", 5),
+            target=coverage.get("target", 0.5),
+        )
+
+    # Checkpoints of each direction's run, so that an interrupted run can be resumed
+    checkpointing = bool(checkpoint_every) or resume
+    if checkpointing and optimizer_name != "vectorized":
+        raise ValueError("Checkpoints and --resume require the vectorized optimizer.")
+    if checkpointing:
+        os.makedirs(checkpoints_dir, exist_ok=True)
+
+    # Explore all four corners of the possible language space (and the interior, with coverage), one process per direction if there are several processes. Each run gets its own child seed and a disjoint range of language ids, so results do not depend on scheduling.
+    seeds = np.random.SeedSequence(configs["random_seed"]).spawn(len(directions))
+    id_stride = generations * sample_size * max_mutations
+    # each run writes its explored langs to a file of its own, read back by this process one lang at a time
+    explored_fns = [f"{store_fn}.{i}.part" for i in range(len(directions))]
+    tasks = [
+        (
+            optimizers[direction],
+            memo,
+            *directions[direction],
+            int(seeds[i].generate_state(1)[0]),
+            seed_population,
+            id_start + i * id_stride,
+            explore,
+            explored_fns[i],
+            (
+                os.path.join(checkpoints_dir, f"{direction}.npz")
+                if checkpointing and direction != "coverage"
+                else None
+            ),
+            checkpoint_every,
+            resume,
+        )
+        for i, direction in enumerate(directions)
+    ]
+    # Stream each direction's explored langs from the file its run wrote them to into one store on disk, deduplicated, while maintaining the Pareto langs for the complexity/comm_cost trade-off over every direction's explored langs
+    store = LanguageStore(store_fn, space)
+    archive = ParetoArchive()
+    num_explored = 0
 
-    print(f"Discovered {len(pool)} languages.")
+    # Cap the final pool with a reservoir of store positions stratified over a grid of (comm_cost, complexity) cells, so that sparse regions of the trade-off plane keep their langs. The natural langs count towards the cap, and the dominant langs, known only at the end, are removed from the reservoir then.
+    num_natural_langs = (
+        len(file_util.load_languages(natural_langs_fn, verbose=False)["languages"])
+        if os.path.exists(natural_langs_fn)
+        else 0
+    )
+    reservoir = StratifiedReservoir(
+        capacity=configs["total_pool_cap"] - num_natural_langs,
+        bounds=[(0.0, 1.0), (0.0, float(max_complexity))],
+        bins=evolutionary_alg_configs.get("pool_bins", 20),
+        # its own generator, as the sequential runs reseed the global one while languages are collected
+        rng=random.Random(configs["random_seed"]),
+    )
+
+    def point(lang: ModalLanguage) -> tuple[float, float]:
+        # as measured by the direction's run, or through the memo for the sampled languages
+        comm_cost, complexity = lang.data.get("comm_cost"), lang.data.get("complexity")
+        if comm_cost is None:
+            comm_cost = 1 - memo("informativity", lang)
+        if complexity is None:
+            complexity = memo("complexity", lang)
+        return (comm_cost, complexity)
+
+    def keep(lang: ModalLanguage) -> None:
+        if store.add(lang):
+            reservoir.add(len(store) - 1, point(lang))
+
+    def collect(i: int, direction: str, result: dict) -> None:
+        nonlocal num_explored
+        if result["id_start"] > id_start + (i + 1) * id_stride:
+            raise ValueError(
+                f"Language ids of the {direction} run overlap the next run's; increase id_stride."
+            )
+        for lang in LanguageStore.languages(explored_fns[i], space):
+            archive.insert(lang, *point(lang))
+            keep(lang)
+        os.remove(explored_fns[i])
+        num_explored += result["num_explored"]
+
+    if processes > 1 and optimizer_name != "pygmo":
+        # each worker process measures with its own copy of the memo, not shared with the other directions
+        with Pool(min(processes, len(directions))) as p:
+            for i, result in enumerate(p.imap(fit_direction_task, tasks)):
+                collect(i, list(directions)[i], result)
+    else:
+        # run the directions in turn in this process, sharing the memo; pygmo islands always run this way, as Pool workers cannot start the islands' processes. Restore the random state the runs reseed, so results match the parallel runs.
+        states = (random.getstate(), np.random.get_state())
+        for i, task in enumerate(tasks):
+            collect(i, list(directions)[i], fit_direction(*task))
+        random.setstate(states[0])
+        np.random.set_state(states[1])
+    id_start += len(directions) * id_stride
+
+    print(f"Discovered {num_explored} languages.")
     print(f"Filtering languages...")
-    pool.extend(sampled_languages)
-    pool = list(set(pool))
-    dominant_langs = list(set(dominant_langs))
-
-    # remove some non-dominant to limit final pool to a standard size
-    # TODO: get rid of this hack
-    num_natural_langs = 28
-    cap = configs["total_pool_cap"] - len(dominant_langs) - num_natural_langs
-    candidate_langs = [lang for lang in pool if lang not in dominant_langs]
-    if len(pool) > cap:
-        reduced_pool = random.sample(candidate_langs, cap)
-        pool = reduced_pool + dominant_langs
-    
+    for lang in sampled_languages:
+        keep(lang)
+    del sampled_languages
+    store.close()
+    print(f"{len(store)} distinct languages stored in {store_fn}")
+    # one of each distinct dominant lang, in the archive's order
+    dominant = {}
+    for lang in archive.items():
+        dominant.setdefault(LanguageStore.fingerprint(lang), lang)
+    dominant_langs = list(dominant.values())
+
+    # limit the final pool to a standard size, reading back only the langs kept
+    dominant_fingerprints = set(dominant)
+    reservoir.discard(
+        {
+            i
+            for i, fingerprint in enumerate(store.fingerprints)
+            if fingerprint in dominant_fingerprints
+        }
+    )
+    reservoir.shrink(
+        configs["total_pool_cap"] - len(dominant_langs) - num_natural_langs
+    )
+    pool = store.read(reservoir.items()) + dominant_langs
+    print(
+        f"Kept {len(pool)} languages, {len(dominant_langs)} of them dominant, leaving room for {num_natural_langs} natural languages."
+    )
+
     print("Saving languages...")
     file_util.save_languages(
         artificial_langs_fn, pool, id_start=id_start, kind="explored"
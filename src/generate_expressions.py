@@ -3,14 +3,55 @@
 Every possible modal meaning that can be expressed by a language is given exactly one expression. This expression is chosen based on a the shortest formula in a language of thought (LoT), which is estimated by a boolean algebra formula minimization heuristic.
 """
 
+import os
 import sys
+import time
+from collections import defaultdict
 from modals.modal_meaning import ModalMeaningSpace
 from modals.modal_language_of_thought import ModalLOT
 from modals.modal_language import ModalExpression
-from misc.file_util import load_space, load_configs, save_expressions
+from misc.file_util import load_space, load_configs
+from misc.file_util import save_expressions, save_lot_stats
 from multiprocess import Pool
 from tqdm import tqdm
 
+# Each worker process builds its own ModalLOT once, so that tasks only need to carry integer bitmasks.
+worker_mlot = None
+
+
+def init_worker(
+    forces: list[str], flavors: list[str], lot_configs: dict, instrument: bool
+) -> None:
+    """Construct the worker's ModalLOT from the meaning space axes and LoT configs, instrumented if search statistics are to be saved."""
+    global worker_mlot
+    worker_mlot = ModalLOT(
+        ModalMeaningSpace(forces, flavors), lot_configs, instrument=instrument
+    )
+
+
+def describe_chunk(chunk: list[int]) -> tuple[int, list[str], list[dict], float]:
+    """Find the minimum LoT descriptions for a chunk of meaning bitmasks.
+
+    Returns:
+        a tuple of the worker's pid, the list of formula strings, the list of search statistics for each formula (empty unless the worker's ModalLOT is instrumented) and the seconds spent on the chunk.
+    """
+    start = time.time()
+    formulas = []
+    stats = []
+    for mask in chunk:
+        formulas.append(worker_mlot.minimum_lot_description_from_bitmask(mask))
+        if worker_mlot.instrument:
+            stats.append(worker_mlot.stats)
+    return (os.getpid(), formulas, stats, time.time() - start)
+
+
+def get_chunksize(num_tasks: int, processes: int) -> int:
+    """Choose a chunk size giving each worker about four chunks.
+
+    Few large chunks keep the per-task overhead low, while having several per worker still balances load when some meanings take much longer to minimize than others.
+    """
+    return max(1, -(-num_tasks // (processes * 4)))
+
 
 if __name__ == "__main__":
     # Everything must be outside of main() otherwise Pool gets mad
@@ -25,6 +66,8 @@ if __name__ == "__main__":
     expression_save_fn = configs["file_paths"][
         "expressions"
     ]  # TODO: consider checking if expressions already exist instead of regenerating every time
+    lot_stats_fn = os.path.join(os.path.dirname(expression_save_fn), "lot_stats.csv")
+    instrument = configs["language_of_thought"].get("instrument", False)
 
     # Generate expressions, measure them, and save
     space = load_space(meaning_space_fn)
@@ -33,10 +76,36 @@ if __name__ == "__main__":
     mlot = ModalLOT(space, configs["language_of_thought"])
     meanings = [x for x in space.generate_meanings()]
 
-    with Pool(configs["processes"]) as p:
-        lot_expressions = list(
-            tqdm(p.imap(mlot.minimum_lot_description, meanings), total=len(meanings))
-        )
+    processes = configs["processes"]
+    masks = [meaning.to_bitmask() for meaning in meanings]
+    chunksize = get_chunksize(len(masks), processes)
+    chunks = [masks[i : i + chunksize] for i in range(0, len(masks), chunksize)]
+
+    lot_expressions = []
+    lot_stats = []
+    throughput = defaultdict(lambda: [0, 0.0])  # pid -> [num meanings, seconds]
+    with Pool(
+        processes,
+        initializer=init_worker,
+        initargs=(
+            space.forces,
+            space.flavors,
+            configs["language_of_thought"],
+            instrument,
+        ),
+    ) as p:
+        with tqdm(total=len(masks)) as progress:
+            for pid, formulas, stats, seconds in p.imap(describe_chunk, chunks):
+                lot_expressions.extend(formulas)
+                lot_stats.extend({"pid": pid, **record} for record in stats)
+                throughput[pid][0] += len(formulas)
+                throughput[pid][1] += seconds
+                progress.update(len(formulas))
+
+    print(f"Minimized {len(masks)} meanings in chunks of {chunksize}:")
+    for pid, (num, seconds) in sorted(throughput.items()):
+        rate = num / seconds if seconds else float("inf")
+        print(f"  worker {pid}: {num} meanings in {seconds:.2f}s ({rate:.1f}/s)")
 
     # Check if negation shouldn't be there
     negation = configs["language_of_thought"]["negation"]
@@ -47,14 +116,35 @@ if __name__ == "__main__":
                 f"Negation shouldn't be in lot but found the following formulae with negation: {lots}"
             )
 
+    # Measure each formula once here, so complexity never needs to be re-parsed downstream
     modal_expressions = [
         ModalExpression(
             form=f"dummy_form_{i}",
             meaning=meaning,
             lot_expression=lot_expressions[i],
+            complexity=mlot.formula_complexity(lot_expressions[i]),
+            histogram=mlot.formula_histogram(lot_expressions[i]),
         )
         for i, meaning in enumerate(meanings)
     ]
 
+    # Check that each formula denotes its meaning before saving
+    invalid = mlot.invalid_descriptions(modal_expressions)
+    if invalid:
+        raise ValueError(
+            f"The following formulae do not denote their meaning: {[e.lot_expression for e in invalid]}"
+        )
+
     save_expressions(expression_save_fn, modal_expressions)
+
+    # Record how the search went for each meaning, to tune ceilings and compare backends
+    if instrument:
+        for i, e in enumerate(modal_expressions):
+            lot_stats[i] = {
+                "form": e.form,
+                "lot": e.lot_expression,
+                "complexity": e.complexity,
+                **lot_stats[i],
+            }
+        save_lot_stats(lot_stats_fn, lot_stats)
     print("done.")
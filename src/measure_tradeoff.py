@@ -1,14 +1,20 @@
 """Script for analyzing the results of the trade-off."""
 
 import sys
+import numpy as np
 import pandas as pd
 from misc import file_util
 from modals.modal_measures import language_complexity
 from modals.modal_language_of_thought import ModalLOT
 from modals.modal_language import iff, sav, dlsav
+from modals.modal_pareto import (
+    non_dominated_indices,
+    non_dominated_ranks,
+    ParetoArchive,
+)
 from altk.effcomm.analysis import get_dataframe
 from altk.effcomm.informativity import informativity
-from altk.effcomm.tradeoff import tradeoff
+from altk.effcomm.tradeoff import pareto_min_distances
 
 
 def main():
@@ -53,8 +59,9 @@ def main():
     space = file_util.load_space(space_fn)
     prior = file_util.load_prior(prior_fn)
 
+    mlot = ModalLOT(space, configs["language_of_thought"])
     comp_measure = lambda lang: language_complexity(
-        language=lang, mlot=ModalLOT(space, configs["language_of_thought"])
+        language=lang, mlot=mlot, weights=configs.get("complexity_weights")
     )
 
     inf_measure = lambda lang: informativity(
@@ -75,14 +82,37 @@ def main():
         "dlsav": dlsav,
     }
 
-    result = tradeoff(
-        languages=langs,
-        properties=properties_to_measure,
-        x="comm_cost",
-        y="complexity",
-    )
-    dom_langs = result["dominating_languages"]
-    langs = result["languages"]
+    print("Measuring languages...")
+    for lang in langs:
+        for prop, measure in properties_to_measure.items():
+            lang.data[prop] = measure(lang)
+
+    # the Pareto frontier and non-dominated ranks by sort-and-sweep, as indices into langs
+    comm_costs = np.array([lang.data["comm_cost"] for lang in langs])
+    complexities = np.array([lang.data["complexity"] for lang in langs])
+    dominant = np.zeros(len(langs), dtype=bool)
+    dominant[non_dominated_indices(comm_costs, complexities)] = True
+    dom_langs = [lang for lang, is_dominant in zip(langs, dominant) if is_dominant]
+
+    # optimality is 1 minus the distance to the frontier, measured by altk as its tradeoff() does, from the frontier found above
+    points = [(lang.data["comm_cost"], lang.data["complexity"]) for lang in langs]
+    dominant_points = [
+        point for point, is_dominant in zip(points, dominant) if is_dominant
+    ]
+    distances = pareto_min_distances(points, dominant_points)
+    print("Setting optimality ...")
+    for lang, distance in zip(langs, distances):
+        # yaml needs floats, not numpy floats
+        lang.data["optimality"] = 1 - float(distance)
+
+    # the frontier when also maximizing the degree of the universal property
+    universal = configs.get("universal_property")
+    if universal is not None:
+        archive = ParetoArchive()
+        for i, lang in enumerate(langs):
+            archive.insert(i, comm_costs[i], complexities[i], -lang.data[universal])
+        dominant_universal = np.zeros(len(langs), dtype=bool)
+        dominant_universal[archive.items()] = True
 
     nat_langs = [lang for lang in langs if lang.natural]
 
@@ -103,7 +133,10 @@ def main():
     )
     # TODO: make this more efficient
     all_data["natural"] = [lang.natural for lang in langs]
-    all_data["dominant"] = [lang in dom_langs for lang in langs]
+    all_data["dominant"] = dominant
+    all_data["pareto_rank"] = non_dominated_ranks(comm_costs, complexities)
+    if universal is not None:
+        all_data["dominant_universal"] = dominant_universal
     all_data["name"] = [lang.data["name"] for lang in langs]
     all_data.to_csv(df_fn, index=False)
     print("saved df.")
@@ -144,6 +144,8 @@ def save_expressions(fn, expressions: list[ModalExpression]):
             # N.B.: force+flavor string is most readable in YML file
             "meaning": [point.name for point in e.meaning.referents],
             "lot": e.lot_expression,
+            "complexity": e.complexity,
+            "histogram": e.histogram,
         }
         for e in expressions
     ]
@@ -166,6 +168,41 @@ def load_expressions(fn) -> list[ModalExpression]:
     return [ModalExpression.from_yaml_rep(x, space) for x in expressions]
 
 
+def save_lot_stats(fn: str, records: list[dict]) -> None:
+    """Save the LoT search statistics of each expression to a CSV, and print a summary.
+
+    Args:
+        fn: the CSV file to save to.
+
+        records: a list of dicts, one per expression, e.g. {'form': 'dummy_form_0', 'nodes_expanded': 1203, 'ceiling_hits': 0, 'gap': 0, ...}, where 'gap' is the difference between the complexity of the description and its lower bound. Keys may differ across records, e.g. for different minimization backends; missing values are left empty.
+    """
+    df = pd.DataFrame(records)
+    df.to_csv(fn, index=False)
+
+    if "ceiling_hits" in df:
+        hits = int((df["ceiling_hits"] > 0).sum())
+        print(f"{hits} of {len(df)} meanings hit the heuristic's ceiling.")
+    if "gap" in df:
+        optimal = int((df["gap"] == 0).sum())
+        print(
+            f"{optimal} of {len(df)} descriptions meet their complexity lower bound and are optimal; the largest gap is {df['gap'].max()}."
+        )
+    if "portfolio_winner" in df:
+        print("Descriptions found by each portfolio backend:")
+        for backend, count in df["portfolio_winner"].value_counts().items():
+            print(f"  {backend}: {count}")
+    if "deadline_hits" in df:
+        hits = int((df["deadline_hits"] > 0).sum())
+        print(f"{hits} of {len(df)} heuristic searches were stopped by the deadline.")
+    times = [column for column in df if column.startswith("time_")]
+    if times:
+        totals = df[times].sum().sort_values(ascending=False)
+        print("Seconds spent in each operation:")
+        for column, seconds in totals.items():
+            print(f"  {column[len('time_'):]}: {seconds:.2f}")
+    print(f"Saved LoT search statistics to {fn}")
+
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 # Languages
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
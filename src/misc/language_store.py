@@ -0,0 +1,108 @@
+"""An append-only store of languages on disk, for pools of explored languages too large to keep in memory."""
+
+import json
+from array import array
+from hashlib import blake2b
+from typing import Iterator
+from modals.modal_meaning import ModalMeaningSpace
+from modals.modal_language import ModalLanguage
+
+
+class LanguageStore:
+    """Languages streamed to a file of one JSON line per language, deduplicated by a 64-bit fingerprint of their meanings.
+
+    Only the fingerprints are kept in memory, so memory stays flat however many languages are added, and languages are read back lazily. Languages are written as their yaml_rep and read back with ModalLanguage.from_yaml_rep, as in file_util.save_languages and load_languages.
+
+    Since fingerprints are of meanings, the store is meant for artificial languages, which are equal exactly when their meanings are; natural languages differing only in their forms would be merged.
+
+    Example usage:
+
+        store = LanguageStore("outputs/dev/languages/explored.jsonl", space)
+        for lang in languages:
+            store.add(lang)
+        store.close()
+        pool = list(store)
+    """
+
+    def __init__(self, fn: str, space: ModalMeaningSpace):
+        """Create an empty store, overwriting any file fn.
+
+        Args:
+            fn: the file to store languages in
+
+            space: the meaning space of the languages, used to read them back
+        """
+        self.fn = fn
+        self.space = space
+        self.seen = set()
+        self.fingerprints = array("Q")  # of each stored language, in order
+        self.file = open(fn, "w")
+
+    @staticmethod
+    def fingerprint(language: ModalLanguage) -> int:
+        """A 64-bit hash of the language's sorted meaning bitmasks (see ModalLanguage.fingerprint)."""
+        key = ",".join(str(mask) for mask in language.fingerprint()).encode()
+        return int.from_bytes(blake2b(key, digest_size=8).digest(), "little")
+
+    def add(self, language: ModalLanguage) -> bool:
+        """Append a language to the store unless a language with the same meanings is already stored.
+
+        Returns:
+            whether the language was added.
+        """
+        fingerprint = self.fingerprint(language)
+        if fingerprint in self.seen:
+            return False
+        self.seen.add(fingerprint)
+        self.fingerprints.append(fingerprint)
+        self.file.write(json.dumps(language.yaml_rep()) + "\n")
+        return True
+
+    def __contains__(self, language: ModalLanguage) -> bool:
+        return self.fingerprint(language) in self.seen
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    def __iter__(self) -> Iterator[ModalLanguage]:
+        """Read the stored languages back one at a time, in the order they were added."""
+        for line in self.__lines():
+            yield self.__parse(line)
+
+    @classmethod
+    def languages(cls, fn: str, space: ModalMeaningSpace) -> Iterator[ModalLanguage]:
+        """Read the languages of a closed store's file back one at a time, in the order they were added, e.g. of a store written by another process."""
+        with open(fn, "r") as stream:
+            for line in stream:
+                yield cls.__parse_line(line, space)
+
+    def read(self, positions: list[int]) -> list[ModalLanguage]:
+        """Read back only the languages at the given positions (in order of addition), in the order of positions."""
+        order = {}
+        for i, position in enumerate(positions):
+            order.setdefault(position, []).append(i)
+        languages = [None] * len(positions)
+        for position, line in enumerate(self.__lines()):
+            if position in order:
+                language = self.__parse(line)
+                for i in order[position]:
+                    languages[i] = language
+        return languages
+
+    def __lines(self) -> Iterator[str]:
+        if not self.file.closed:
+            self.file.flush()
+        with open(self.fn, "r") as stream:
+            yield from stream
+
+    def __parse(self, line: str) -> ModalLanguage:
+        return self.__parse_line(line, self.space)
+
+    @staticmethod
+    def __parse_line(line: str, space: ModalMeaningSpace) -> ModalLanguage:
+        ((name, lang_dict),) = json.loads(line).items()
+        return ModalLanguage.from_yaml_rep(name, lang_dict, space)
+
+    def close(self) -> None:
+        """Stop adding languages; the store can still be read."""
+        self.file.close()
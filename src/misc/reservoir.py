@@ -0,0 +1,97 @@
+"""A streaming sampler that caps a pool of languages while preserving its coverage of the trade-off plane."""
+
+import heapq
+import random
+from typing import Any
+
+
+class StratifiedReservoir:
+    """A reservoir sample of at most `capacity` items, stratified over a grid of cells of their points, e.g. (comm_cost, complexity).
+
+    Uniform subsampling keeps few items from sparse regions of the plane, which are the hardest to explore. Instead, whenever the reservoir is over capacity, an item is evicted from the cell holding the most items, so that every cell keeps min(number of items seen in it, t) items for a common level t, and sparse cells keep all of theirs.
+
+    Within each cell, items are sampled uniformly: each item gets a random key, a cell keeps the items with the lowest keys, and once a cell has evicted an item, later items with a higher key than any evicted are rejected. Memory is bounded by the capacity, however many items are added.
+
+    Example usage:
+
+        reservoir = StratifiedReservoir(capacity=1000, bounds=[(0, 1), (0, 60)], bins=20, rng=random.Random(42))
+        for i, lang in enumerate(languages):
+            reservoir.add(i, (lang.data["comm_cost"], lang.data["complexity"]))
+        kept = reservoir.items()
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        bounds: list[tuple[float, float]],
+        bins: int,
+        rng: random.Random = None,
+    ):
+        """
+        Args:
+            capacity: the maximum number of items to keep
+
+            bounds: the (lowest, highest) value of each coordinate of points, dividing the plane into a grid. Points outside the bounds are put in the nearest cell.
+
+            bins: the number of cells along each coordinate
+
+            rng: the random generator drawing the items' keys, e.g. random.Random(seed), so that which items are kept depends only on the order they are added. If None, a new unseeded generator is used.
+        """
+        self.capacity = capacity
+        self.bounds = bounds
+        self.bins = bins
+        self.rng = rng if rng is not None else random.Random()
+        self.cells = {}  # cell -> heap of (-key, item), i.e. the largest key first
+        self.thresholds = {}  # cell -> lowest key evicted from it
+        self.sizes = []  # lazy heap of (-size, cell), largest cell first
+        self.size = 0
+
+    def cell(self, point: tuple) -> tuple[int]:
+        """The grid cell of a point. Points with a missing (None) coordinate share the cell (-1, ...)."""
+        if any(value is None for value in point):
+            return tuple(-1 for _ in point)
+        cell = []
+        for value, (low, high) in zip(point, self.bounds):
+            index = int((value - low) / (high - low) * self.bins) if high > low else 0
+            cell.append(min(max(index, 0), self.bins - 1))
+        return tuple(cell)
+
+    def add(self, item: Any, point: tuple) -> None:
+        """Offer an item at a point to the reservoir, evicting an item if it is over capacity."""
+        key = self.rng.random()
+        cell = self.cell(point)
+        if key >= self.thresholds.get(cell, 1.0):
+            return
+        heapq.heappush(self.cells.setdefault(cell, []), (-key, item))
+        heapq.heappush(self.sizes, (-len(self.cells[cell]), cell))
+        self.size += 1
+        self.shrink(self.capacity)
+
+    def shrink(self, capacity: int) -> None:
+        """Evict items from the largest cells until at most `capacity` remain, and keep to that capacity from now on."""
+        self.capacity = capacity
+        while self.size > self.capacity:
+            size, cell = heapq.heappop(self.sizes)
+            if -size != len(self.cells.get(cell, [])):
+                continue  # stale entry
+            key, _ = heapq.heappop(self.cells[cell])
+            self.thresholds[cell] = -key
+            self.size -= 1
+            heapq.heappush(self.sizes, (-len(self.cells[cell]), cell))
+
+    def discard(self, items: set) -> None:
+        """Remove the given items from the reservoir, if present."""
+        for cell, heap in self.cells.items():
+            kept = [entry for entry in heap if entry[1] not in items]
+            if len(kept) < len(heap):
+                heapq.heapify(kept)
+                self.cells[cell] = kept
+                self.size -= len(heap) - len(kept)
+                heapq.heappush(self.sizes, (-len(kept), cell))
+
+    def items(self) -> list:
+        """The items in the reservoir, sorted."""
+        return sorted(item for heap in self.cells.values() for _, item in heap)
+
+    def __len__(self) -> int:
+        return self.size
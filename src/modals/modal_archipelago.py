@@ -0,0 +1,238 @@
+"""An island model optimizer for exploring modal languages with a pygmo archipelago.
+
+Each island evolves its own population of languages with NSGA-II, in its own process, and islands on a ring periodically exchange their best languages by migration. Running one island per core scales exploration with the number of cores, where the EvolutionaryOptimizer of each direction runs on a single core.
+
+A language is encoded for pygmo as a fixed-length vector of integer genes, one per possible expression, where gene value k > 0 is the (k-1)th expression and 0 is an unused slot. The first gene is never 0, so that every vector encodes a nonempty language. Languages are measured in batches with VectorizedModalOptimizer.measure. Each island's problem records every language it measures with its objective values, so that after every migration every language the islands evaluated is gathered, as the other optimizers explore every language they measure.
+
+Since the islands evolve concurrently, which languages migrate depends on timing, so that runs are not exactly reproducible even with the same seed.
+
+    Typical usage example:
+
+    optimizer = ArchipelagoModalOptimizer(objectives, expressions, sample_size, max_mutations, generations, lang_size, islands=8)
+    result = optimizer.fit(seed_population, id_start)
+"""
+
+import numpy as np
+import pygmo as pg
+from modals.modal_language import ModalLanguage
+from modals.modal_optimization import VectorizedModalOptimizer
+from modals.modal_pareto import ParetoArchive
+
+
+class ModalLanguageProblem:
+    """A pygmo user-defined problem of minimizing two objectives of a modal language, on integer encodings of languages."""
+
+    def __init__(self, optimizer: VectorizedModalOptimizer):
+        """
+        Args:
+            optimizer: the optimizer whose expressions, objectives x and y, and measure define the problem.
+        """
+        self.optimizer = optimizer
+        # the batches of rows measured since they were last gathered, with their scores
+        self.evaluated = []
+
+    def get_bounds(self) -> tuple[list[int], list[int]]:
+        num_expressions = len(self.optimizer.expressions)
+        size = self.optimizer.lang_size
+        return ([1] + [0] * (size - 1), [num_expressions] * size)
+
+    def get_nobj(self) -> int:
+        return 2
+
+    def get_nix(self) -> int:
+        return self.optimizer.lang_size
+
+    def get_name(self) -> str:
+        return "Modal language trade-off"
+
+    def fitness(self, dv: np.ndarray) -> list[float]:
+        return self.batch_fitness(dv)
+
+    def batch_fitness(self, dvs: np.ndarray) -> np.ndarray:
+        """The objectives of several languages at once, from their concatenated decision vectors."""
+        P = self.decode(dvs)
+        scores = self.optimizer.measure(P)
+        self.evaluated.append((P, scores))
+        return np.stack(
+            [scores[self.optimizer.x], scores[self.optimizer.y]], axis=1
+        ).ravel()
+
+    def has_batch_fitness(self) -> bool:
+        return True
+
+    def encode(self, P: np.ndarray) -> np.ndarray:
+        """Convert rows of expression indices to decision vectors."""
+        return P[:, : self.optimizer.lang_size] + 1
+
+    def decode(self, dvs: np.ndarray) -> np.ndarray:
+        """Convert concatenated decision vectors to left-aligned rows of distinct expression indices, padded with -1."""
+        genes = np.rint(np.asarray(dvs)).astype(np.int64)
+        genes = genes.reshape(-1, self.optimizer.lang_size) - 1
+        genes.sort(axis=1)
+        # drop repeated expressions, then move the empty slots to the end
+        repeats = np.zeros_like(genes, dtype=bool)
+        repeats[:, 1:] = genes[:, 1:] == genes[:, :-1]
+        genes[repeats] = -1
+        P = np.full((len(genes), self.optimizer.lang_size + 1), -1, dtype=np.int64)
+        P[:, :-1] = -np.sort(-genes, axis=1)
+        return P
+
+
+class ArchipelagoModalOptimizer(VectorizedModalOptimizer):
+    def __init__(
+        self,
+        *args,
+        islands: int = 4,
+        migration_every: int = 10,
+        **kwargs,
+    ):
+        """Initialize the optimizer with the parameters of VectorizedModalOptimizer, and:
+
+        Args:
+            islands: the number of islands, each evolving in its own process. The sample_size languages of a generation are split between the islands.
+
+            migration_every: the number of generations between migrations. Explored languages are also gathered after each migration.
+        """
+        super().__init__(*args, **kwargs)
+        self.islands = islands
+        self.migration_every = migration_every
+
+    def fit(
+        self,
+        seed_population: list[ModalLanguage],
+        id_start: int,
+        explore: float = 0.0,
+        seed: int = None,
+    ) -> dict:
+        """Run NSGA-II on an archipelago of islands on a ring, starting from the seed population.
+
+        Args:
+            seed_population: the languages of the first generation, dealt out among the islands
+
+            id_start: the number of languages generated so far, used to name new languages
+
+            explore: the fraction of each island's population replaced by languages drawn from all explored languages after each migration
+
+            seed: the seed of the islands' algorithms and populations. If None, it is drawn from numpy's global random state.
+
+        Returns:
+            a dict of the "dominating_languages" among all explored languages, the distinct "explored_languages", i.e. every language an island evaluated, the updated "id_start" and the number of "generations" run, as VectorizedModalOptimizer returns. With a patience, the run stops once the hypervolume of the frontier stops improving between migrations.
+        """
+        if seed is None:
+            seed = np.random.randint(2**31)
+        rng = np.random.default_rng(seed)
+        problem = ModalLanguageProblem(self)
+        prob = pg.problem(problem)
+
+        # NSGA-II needs populations of a multiple of 4, and at least 8
+        pop_size = max(8, self.sample_size // self.islands // 4 * 4)
+        seeds = problem.encode(self.encode(seed_population))
+        low, high = problem.get_bounds()
+        archi = pg.archipelago(t=pg.topology(pg.ring()))
+        for i in range(self.islands):
+            algo = self.algorithm(self.migration_every, rng)
+            pop = pg.population(prob, seed=int(rng.integers(2**31)))
+            for dv in seeds[i :: self.islands][:pop_size]:
+                pop.push_back(dv)
+            while len(pop) < pop_size:
+                pop.push_back(rng.integers(low, np.array(high) + 1))
+            archi.push_back(udi=pg.mp_island(), algo=algo, pop=pop)
+
+        explored = []
+        archive = ParetoArchive()
+        hypervolumes = []
+        reference = None
+        # the patience in migration epochs
+        window = -(-self.patience // self.migration_every)
+        epochs = -(-self.generations // self.migration_every)
+        done = 0
+        for epoch in range(epochs + 1):
+            if epoch:
+                # the last epoch only runs the generations left
+                remaining = self.generations - done
+                if remaining < self.migration_every:
+                    for island in archi:
+                        island.set_algorithm(self.algorithm(remaining, rng))
+                archi.evolve()
+                archi.wait_check()
+                done += min(remaining, self.migration_every)
+            pool = np.concatenate(explored) if explored else None
+            P, scores = self.gather(archi, pool, explore, rng)
+            explored.append(P)
+            self.remember(P, scores)
+            dominating = self.unique_rows(P, self.dominating(scores))
+            for key, i in zip(self.row_keys(P[dominating]), dominating):
+                archive.insert(key, scores[self.x][i], scores[self.y][i])
+
+            if self.patience:
+                if reference is None:
+                    reference = self.reference_point(scores)
+                hypervolumes.append(archive.hypervolume(reference))
+                if self.converged(hypervolumes, window):
+                    break
+
+        result = self.results(explored, archive, id_start)
+        result["generations"] = done
+        return result
+
+    def algorithm(self, generations: int, rng: np.random.Generator) -> pg.algorithm:
+        """NSGA-II for a number of generations, measuring each generation's offspring with one call to batch_fitness."""
+        nsga2 = pg.nsga2(gen=generations, seed=int(rng.integers(2**31)))
+        nsga2.set_bfe(pg.bfe())
+        return pg.algorithm(nsga2)
+
+    def gather(
+        self,
+        archi: pg.archipelago,
+        pool: np.ndarray = None,
+        explore: float = 0.0,
+        rng: np.random.Generator = None,
+    ) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """Collect the languages every island evaluated since the last gathering, clearing the islands' records, and replace a fraction of each island's population with explored languages.
+
+        Args:
+            archi: the archipelago
+
+            pool: the rows explored so far, to draw replacements from, or None
+
+            explore: the fraction of each island's population to replace
+
+            rng: the Generator drawing the replaced individuals and their replacements
+
+        Returns:
+            a tuple of the evaluated rows of expression indices and their scores, by objective.
+        """
+        batches = []
+        for island in archi:
+            pop = island.get_population()
+            problem = pop.problem.extract(ModalLanguageProblem)
+            batches.extend(problem.evaluated)
+            problem.evaluated.clear()
+            num_explore = int(explore * len(pop))
+            if pool is not None and num_explore:
+                replaced = rng.choice(len(pop), num_explore, replace=False)
+                rows = pool[rng.choice(len(pool), num_explore)]
+                for i, dv in zip(replaced, problem.encode(rows)):
+                    pop.set_x(int(i), dv)
+            island.set_population(pop)
+
+        P = np.concatenate([P for P, _ in batches])
+        scores = {
+            name: np.concatenate([scores[name] for _, scores in batches])
+            for name in batches[0][1]
+        }
+        return (P, scores)
+
+    def remember(self, P: np.ndarray, scores: dict[str, np.ndarray]) -> None:
+        """Put the objective values measured by the islands' processes in this process's memo, so that they are not measured again for the results."""
+        if self.memo is None:
+            return
+        batched = (
+            ["complexity", "simplicity"] if self.item_complexities is not None else []
+        )
+        names = [name for name in scores if name not in batched]
+        for i, row in enumerate(P):
+            fingerprint = tuple(sorted(self.masks[row[row >= 0]].tolist()))
+            for name in names:
+                value = float(scores[name][i])
+                self.memo.get(name, fingerprint, lambda: value)
@@ -0,0 +1,162 @@
+"""A coverage-guided optimizer for exploring the interior of the space of modal languages.
+
+The four directions of estimate_pareto_frontier push populations towards the corners of the (comm_cost, complexity) plane, so that its interior is only covered by the languages met on the way. This optimizer instead keeps an occupancy grid of the distinct languages explored so far over the plane, and breeds each generation from parents chosen in inverse proportion to the occupancy of their cells. It also biases each parent's mutations towards the emptier of the neighbouring cells in complexity, since adding expressions or points raises complexity and removing them lowers it.
+
+A run stops once the grid is covered: once a target fraction of the whole grid is filled, counting at most per_cell languages in a cell. Coverage only grows as exploration goes on, whether it reaches new cells or fills known ones. Cells beyond the frontier hold no languages at all, and some others only a few, so full coverage is unreachable and targets should leave room for them.
+
+    Typical usage example:
+
+    optimizer = CoverageModalOptimizer(objectives, expressions, sample_size, max_mutations, generations, lang_size, item_complexities=c, bounds=[(0, 1), (0, 60)])
+    result = optimizer.fit(seed_population, id_start)
+"""
+
+import numpy as np
+from modals.modal_language import ModalLanguage
+from modals.modal_optimization import MUTATIONS, VectorizedModalOptimizer
+from modals.modal_pareto import ParetoArchive
+
+# The mutations raising and lowering complexity, as columns of MUTATIONS
+GROWING = [MUTATIONS.index("Add_Modal"), MUTATIONS.index("Add_Point")]
+SHRINKING = [MUTATIONS.index("Remove_Modal"), MUTATIONS.index("Remove_Point")]
+
+
+class CoverageModalOptimizer(VectorizedModalOptimizer):
+    def __init__(
+        self,
+        *args,
+        bounds: list[tuple[float, float]] = None,
+        bins: int = 20,
+        per_cell: int = 5,
+        target: float = 0.5,
+        **kwargs,
+    ):
+        """Initialize the optimizer with the parameters of VectorizedModalOptimizer, and:
+
+        Args:
+            bounds: the (lowest, highest) values of x and y, dividing the plane into the grid. Languages outside the bounds are counted in the nearest cell. If None, the ranges of x and y in the first generation are used.
+
+            bins: the number of cells along each axis
+
+            per_cell: the number of languages that fills a cell
+
+            target: the coverage at which to stop, between 0 and 1 (see coverage)
+        """
+        super().__init__(*args, **kwargs)
+        self.bounds = bounds
+        self.bins = bins
+        self.per_cell = per_cell
+        self.target = target
+
+    def cells(
+        self, scores: dict[str, np.ndarray], bounds: list[tuple[float, float]]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """The grid cell (column, row) of each language, from its x and y."""
+        cells = []
+        for name, (low, high) in zip([self.x, self.y], bounds):
+            scale = self.bins / (high - low) if high > low else 0.0
+            index = np.floor((scores[name] - low) * scale).astype(np.int64)
+            cells.append(np.clip(index, 0, self.bins - 1))
+        return tuple(cells)
+
+    def coverage(self, counts: np.ndarray) -> float:
+        """The fraction of the grid filled: the number of languages in each cell, up to per_cell, summed over all cells and divided by per_cell times the number of cells."""
+        return float(
+            np.minimum(counts, self.per_cell).sum() / (self.per_cell * counts.size)
+        )
+
+    def mutation_weights(
+        self, counts: np.ndarray, cells: tuple[np.ndarray, np.ndarray]
+    ) -> np.ndarray:
+        """Weights of the mutations of languages in the given cells, inversely proportional to one plus the occupancy of the cell each mutation moves towards: the cell above in complexity for growing mutations, the cell below for shrinking ones, and the same cell for Interchange_Modal. Moving off the grid counts as moving to a full cell."""
+        column, row = cells
+        padded = np.pad(counts, ((0, 0), (1, 1)), constant_values=self.per_cell)
+        weights = np.empty((len(column), len(MUTATIONS)))
+        weights[:] = 1 / (1 + counts[column, row])[:, None]
+        weights[:, GROWING] = 1 / (1 + padded[column, row + 2])[:, None]
+        weights[:, SHRINKING] = 1 / (1 + padded[column, row])[:, None]
+        return weights
+
+    def fit(
+        self,
+        seed_population: list[ModalLanguage],
+        id_start: int,
+        explore: float = 0.0,
+        seed: int = None,
+    ) -> dict:
+        """Explore from the seed population until the grid is covered or every generation has run.
+
+        Args:
+            seed_population: the languages of the first generation
+
+            id_start: the number of languages generated so far, used to name new languages
+
+            explore: unused, since parents are always chosen among all explored languages
+
+            seed: the seed of the numpy random Generator. If None, it is drawn from numpy's global random state.
+
+        Returns:
+            a dict of the "dominating_languages" among all explored languages, the distinct "explored_languages", the updated "id_start" and the number of "generations" run, as VectorizedModalOptimizer returns.
+        """
+        if seed is None:
+            seed = np.random.randint(2**32)
+        rng = np.random.default_rng(seed)
+
+        P = self.encode(seed_population)
+        bounds = self.bounds
+        explored = []
+        archive = ParetoArchive()
+        # the distinct languages explored so far, their cells, and the occupancy of each cell
+        seen = set()
+        pool = []
+        columns, rows = [], []
+        counts = np.zeros((self.bins, self.bins), dtype=np.int64)
+
+        done = 0
+        for generation in range(self.generations):
+            scores = self.measure(P)
+            explored.append(P)
+            dominating = self.unique_rows(P, self.dominating(scores))
+            for key, i in zip(self.row_keys(P[dominating]), dominating):
+                archive.insert(key, scores[self.x][i], scores[self.y][i])
+
+            # count each distinct language once
+            new = self.unique_rows(P, np.arange(len(P)))
+            keys = self.row_keys(P[new])
+            new = np.array(
+                [i for i, key in zip(new, keys) if key not in seen], dtype=np.int64
+            )
+            seen.update(self.row_keys(P[new]))
+            if bounds is None:
+                bounds = [
+                    (float(np.min(scores[name])), float(np.max(scores[name])))
+                    for name in [self.x, self.y]
+                ]
+            column, row = self.cells(
+                {name: values[new] for name, values in scores.items()}, bounds
+            )
+            np.add.at(counts, (column, row), 1)
+            pool.append(P[new])
+            columns.append(column)
+            rows.append(row)
+
+            done = generation + 1
+            if self.coverage(counts) >= self.target:
+                break
+
+            # breed from parents in sparse cells, mutating towards sparse neighbours
+            cells = (np.concatenate(columns), np.concatenate(rows))
+            weights = 1 / counts[cells]
+            parents = rng.choice(
+                len(weights), size=self.sample_size, p=weights / weights.sum()
+            )
+            num_mutations = rng.integers(1, self.max_mutations + 1, size=len(parents))
+            P = self.mutate(
+                np.concatenate(pool)[parents],
+                num_mutations,
+                rng,
+                self.mutation_weights(counts, (cells[0][parents], cells[1][parents])),
+            )
+
+        result = self.results(explored, archive, id_start)
+        result["generations"] = done
+        return result
@@ -19,12 +19,23 @@ class ModalExpression(Expression):
 
     Example usage:
 
-        e = Modal_Expression('might', {'weak+epistemic'}, '(* (weak ) (epistemic ))')
+        e = Modal_Expression('might', {'weak+epistemic'}, '(* (weak ) (epistemic ))', complexity=4)
     """
 
-    def __init__(self, form, meaning, lot_expression):
+    def __init__(
+        self,
+        form,
+        meaning,
+        lot_expression,
+        complexity: int = None,
+        histogram: dict[str, int] = None,
+    ):
         super().__init__(form, meaning)
         self.lot_expression = lot_expression
+        # the complexity of the lot_expression, computed once when expressions are generated. None if unknown, in which case it is measured by parsing the formula.
+        self.complexity = complexity
+        # the counts of each atom and operator type in the lot_expression (see ModalLOT.formula_histogram), for re-weighting complexity. None if unknown.
+        self.histogram = histogram
 
     def __hash__(self) -> int:
         return hash(
@@ -51,6 +62,8 @@ class ModalExpression(Expression):
             # N.B.: force+flavor string is most readable in YML file
             "meaning": [point.name for point in self.meaning.referents],
             "lot": self.lot_expression,
+            "complexity": self.complexity,
+            "histogram": self.histogram,
         }
 
     @classmethod
@@ -58,15 +71,48 @@ class ModalExpression(Expression):
         """Takes a yaml representation and returns the corresponding Modal Expression.
 
         Args:
-            - rep: a dictionary of the form {'form': str, 'meaning': list[str], 'lot': str}
+            - rep: a dictionary of the form {'form': str, 'meaning': list[str], 'lot': str, 'complexity': int, 'histogram': dict[str, int]}. The 'complexity' and 'histogram' keys are optional, for files saved before they were precomputed.
         """
         form = rep["form"]
         points = [ModalMeaningPoint.from_yaml_rep(name=name) for name in rep["meaning"]]
         # points = [ModalMeaningPoint(name=name) for name in rep["meaning"]]
         lot = rep["lot"]
+        complexity = rep.get("complexity")
+        histogram = rep.get("histogram")
 
         meaning = ModalMeaning(points, space)
-        return cls(form, meaning, lot)
+        return cls(form, meaning, lot, complexity, histogram)
+
+
+class ModalExpressionIndex:
+    """A map from meaning bitmasks to the expression with that meaning, for constant time lookup of expressions by meaning.
+
+    Meanings are bitmasks in the layout of ModalMeaningSpace.point_to_bit, so that neighbouring meanings in the lattice of meanings are one bit operation away: adding a point sets its bit and removing a point clears it.
+
+    Example usage:
+
+        index = ModalExpressionIndex(expressions)
+        e = index.get(1 << space.point_to_bit(point))
+    """
+
+    def __init__(self, expressions: list[ModalExpression]):
+        self.expressions = {}
+        # the positions in the list of expressions with each meaning
+        self.positions = {}
+        for i, e in enumerate(expressions):
+            mask = e.meaning.to_bitmask()
+            self.expressions[mask] = e
+            self.positions.setdefault(mask, []).append(i)
+
+    def get(self, mask: int) -> ModalExpression:
+        """The expression with the meaning given by `mask`, or None if there is none."""
+        return self.expressions.get(mask)
+
+    def __contains__(self, mask: int) -> bool:
+        return mask in self.expressions
+
+    def __len__(self) -> int:
+        return len(self.expressions)
 
 
 ##############################################################################
@@ -173,6 +219,66 @@ class ModalLanguage(Language):
         if not val:
             raise ValueError("list of ModalExpressions must not be empty.")
         self._expressions = self.rename_synonyms(val)
+        self.__count_points()
+
+    def add_expression(self, e: ModalExpression) -> None:
+        """Add an expression to the language, updating the coverage counts incrementally.
+
+        Synonyms of an expression already in the language go through the expressions setter, so that they are renamed.
+        """
+        if e in self._expressions:
+            self.expressions = self._expressions + [e]
+            return
+        self._expressions.append(e)
+        self.__count_expression(e, 1)
+
+    def pop(self, index: int) -> ModalExpression:
+        """Remove and return the expression at index, updating the coverage counts incrementally."""
+        if len(self._expressions) <= 1:
+            raise ValueError("list of ModalExpressions must not be empty.")
+        e = self._expressions.pop(index)
+        self.__count_expression(e, -1)
+        return e
+
+    def remove_expression(self, e: ModalExpression) -> None:
+        """Remove the first occurrence of an expression from the language."""
+        self.pop(self._expressions.index(e))
+
+    def fingerprint(self) -> tuple[int]:
+        """A canonical, hashable key of the language's meanings: the sorted meaning bitmasks of its expressions, with repeats for synonyms.
+
+        Languages with the same fingerprint have the same informativity, and the same complexity when their expressions come from the same generated expressions.
+        """
+        return tuple(sorted(self.meaning_ids.elements()))
+
+    def __count_points(self) -> None:
+        """Recompute the coverage of the meaning space from scratch.
+
+        The language maintains `coverage`, the bitmask of the points expressed by any of its expressions, `point_counts`, the number of expressions expressing each point by bit, `num_ambiguous`, the number of expressions expressing more than one point, and `meaning_ids`, the multiset of meaning bitmasks of its expressions, for constant time membership tests. They are kept up to date by add_expression, pop and remove_expression, so the expressions list should not be modified in place.
+        """
+        self.coverage = 0
+        self.point_counts = Counter()
+        self.num_ambiguous = 0
+        self.meaning_ids = Counter()
+        for e in self._expressions:
+            self.__count_expression(e, 1)
+
+    def __count_expression(self, e: ModalExpression, sign: int) -> None:
+        """Add (sign=1) or subtract (sign=-1) an expression's points from the coverage counts."""
+        mask = e.meaning.to_bitmask()
+        self.meaning_ids[mask] += sign
+        if not self.meaning_ids[mask]:
+            del self.meaning_ids[mask]
+        if bin(mask).count("1") > 1:
+            self.num_ambiguous += sign
+        while mask:
+            bit = (mask & -mask).bit_length() - 1
+            mask &= mask - 1
+            self.point_counts[bit] += sign
+            if self.point_counts[bit]:
+                self.coverage |= 1 << bit
+            else:
+                self.coverage &= ~(1 << bit)
 
     def __str__(self) -> str:
         expressions_str = "\n".join([str(e) for e in self.expressions])
@@ -9,11 +9,20 @@ This representation language is a hypothesis about how to measure the cognitive
 """
 
 
+import re
+import time
+import operator
 import numpy as np
+from functools import reduce
+from typing import Callable
+from collections import Counter, defaultdict
 from nltk.tree import Tree
 from nltk.grammar import Nonterminal
 from modals.modal_meaning import ModalMeaning, ModalMeaningSpace
 
+# The atom and operator types counted by ModalLOT.formula_histogram. 'identity' counts the atoms 0 and 1.
+HISTOGRAM_KEYS = ["identity", "force", "flavor", "+", "*", "-"]
+
 ##############################################################################
 # ExpressionTree
 ##############################################################################
@@ -121,18 +130,59 @@ class ExpressionTree:
 
 
 class ModalLOT:
-    def __init__(self, meaning_space: ModalMeaningSpace, lot_configs: dict[str, bool]):
+    def __init__(
+        self,
+        meaning_space: ModalMeaningSpace,
+        lot_configs: dict[str, bool],
+        instrument: bool = False,
+    ):
         """Initialize the LoT, which depends on the number of forces and flavors.
 
         Args:
             meaning_space: the modal meaning space
 
-            lot_configs: a dicts of strings and boolean values representing the operators to use in the LoT. E.g., {'negation': True}
+            lot_configs: a dicts of strings and boolean values representing the operators to use in the LoT. E.g., {'negation': True}. May also contain a 'backend' key naming the minimization algorithm: 'heuristic' (default), the breadth first search of boolean rewrites below, 'two_level', an implicant cover minimizer that scales to larger meaning spaces, or 'egraph', an equality saturation search over the heuristic's rewrite rules, or 'portfolio', which runs the backends listed under lot_configs['portfolio']['backends'] within a per-meaning wall-clock budget of lot_configs['portfolio']['budget'] seconds and keeps the shortest description.
+
+            instrument: whether to collect search statistics for each description in `self.stats`, e.g. nodes expanded, hits of the heuristic's ceiling and time spent in each rewrite operation. Off by default, since timing each operation slows the search.
         """
+        self.meaning_space = meaning_space
         self.forces = meaning_space.forces
         self.flavors = meaning_space.flavors
         self.contains_negation = lot_configs["negation"]
 
+        self.backend = lot_configs.get("backend", "heuristic")
+        if self.backend == "portfolio":
+            portfolio = lot_configs.get("portfolio", {})
+            self.portfolio = [
+                (name, self.__make_minimizer(name))
+                for name in portfolio.get("backends", ["two_level", "heuristic"])
+            ]
+            self.budget = portfolio.get("budget", 1.0)
+            self.minimizer = None
+        else:
+            self.minimizer = self.__make_minimizer(self.backend)
+        # wall-clock time (time.perf_counter) at which searches stop and return the best description so far, or None
+        self.deadline = None
+        # memo of formula string -> complexity, so each formula is parsed at most once
+        self._complexity_cache = {}
+
+        # the meaning bitmask denoted by each atom, in the layout of ModalMeaningSpace.point_to_bit
+        width = len(self.flavors)
+        full = (1 << (len(self.forces) * width)) - 1
+        force_masks = [
+            ((1 << width) - 1) << (i * width) for i in range(len(self.forces))
+        ]
+        flavor_masks = [
+            sum(1 << (i * width + j) for i in range(len(self.forces)))
+            for j in range(width)
+        ]
+        self.atoms = ["0", "1"] + self.forces + self.flavors
+        self.atom_masks = tuple([0, full] + force_masks + flavor_masks)
+        self._bitmask_cache = {}
+
+        self.instrument = instrument
+        self.stats = None
+
     def minimum_lot_description(self, meaning: ModalMeaning) -> list:
         """Runs a heuristic to estimate the shortest length description of modal meanings in a language of thought.
 
@@ -148,9 +198,23 @@ class ModalLOT:
         # arrs = [meaning.to_array() for meaning in meanings]
         # r = [str(self.__joint_heuristic(arr)) for arr in tqdm(arrs)]
         arr = meaning.to_array()
-        r = str(self.__joint_heuristic(arr))
+        r = str(self.__minimize(arr))
         return r
 
+    def minimum_lot_description_from_bitmask(self, mask: int) -> str:
+        """Runs the minimum description heuristic on a meaning given as an integer bitmask.
+
+        This is the cheap-to-pickle counterpart to minimum_lot_description, used when meanings are sent to worker processes.
+
+        Args:
+            mask: the bitmask of the meaning, in the layout of ModalMeaningSpace.point_to_bit
+
+        Returns:
+            the string of the shortest LoT description found
+        """
+        arr = self.meaning_space.bitmask_to_array(mask)
+        return str(self.__minimize(arr))
+
     def expression_complexity(self, ET: ExpressionTree) -> int:
         """
         Returns the number of atoms in the expression,
@@ -166,6 +230,226 @@ class ModalLOT:
             [self.expression_complexity(ExpressionTree(child)) for child in ET.tree()]
         )
 
+    def formula_complexity(self, formula: str) -> int:
+        """Returns the complexity of a bracketed LoT formula string.
+
+        Parsing a formula is expensive, so results are memoised on the string.
+
+        Args:
+            formula: the bracketed string of a LoT expression, e.g. '(* (weak ) (epistemic ))'
+        """
+        if formula not in self._complexity_cache:
+            self._complexity_cache[formula] = self.expression_complexity(
+                ExpressionTree.from_string(formula)
+            )
+        return self._complexity_cache[formula]
+
+    def compile_formula(self, formula: str) -> Callable[[tuple[int]], int]:
+        """Compile a bracketed LoT formula string into a function computing the meaning bitmask it denotes.
+
+        Each atom denotes the bitmask of the points where it is true, so that +, * and - become |, & and complement. The formula is parsed once into nested closures, so that evaluating it takes a few integer operations instead of a walk over its nltk Tree.
+
+        Args:
+            formula: the bracketed string of a LoT expression, e.g. '(* (weak ) (epistemic ))'
+
+        Returns:
+            a function from the bitmasks of the atoms, ordered as in self.atoms (e.g. self.atom_masks), to the bitmask of the formula.
+        """
+        tokens = self.__tokenize(formula)
+        function, end = self.__compile_tokens(tokens, 0)
+        if end != len(tokens):
+            raise ValueError(f"Unexpected tokens after the end of formula: {formula}")
+        return function
+
+    def formula_to_bitmask(self, formula: str) -> int:
+        """Returns the meaning bitmask denoted by a bracketed LoT formula string, memoised on the string.
+
+        Args:
+            formula: the bracketed string of a LoT expression, e.g. '(* (weak ) (epistemic ))'
+        """
+        if formula not in self._bitmask_cache:
+            self._bitmask_cache[formula] = self.compile_formula(formula)(
+                self.atom_masks
+            )
+        return self._bitmask_cache[formula]
+
+    def formula_histogram(self, formula: str) -> dict[str, int]:
+        """Count the atoms and operators of each type in a bracketed LoT formula string.
+
+        Any complexity measure that is a weighted sum over atom and operator types is a dot product with this histogram, e.g. expression_complexity weights identity atoms 1, other atoms 2 and operators 0.
+
+        Args:
+            formula: the bracketed string of a LoT expression, e.g. '(* (weak ) (epistemic ))'
+
+        Returns:
+            a dict from each of HISTOGRAM_KEYS to its count in the formula.
+        """
+        histogram = dict.fromkeys(HISTOGRAM_KEYS, 0)
+        tokens = self.__tokenize(formula)
+        for i, token in enumerate(tokens[:-1]):
+            if token != "(":
+                continue
+            label = tokens[i + 1]
+            if tokens[i + 2] != ")":
+                histogram[label] += 1
+            elif label in ["0", "1"]:
+                histogram["identity"] += 1
+            elif label in self.forces:
+                histogram["force"] += 1
+            else:
+                histogram["flavor"] += 1
+        return histogram
+
+    def invalid_descriptions(self, expressions: list) -> list:
+        """Find the expressions whose LoT formula does not denote their meaning.
+
+        Args:
+            expressions: a list of ModalExpressions
+
+        Returns:
+            the list of expressions whose lot_expression evaluates to a different meaning bitmask than their meaning.
+        """
+        return [
+            e
+            for e in expressions
+            if self.formula_to_bitmask(e.lot_expression) != e.meaning.to_bitmask()
+        ]
+
+    def __tokenize(self, formula: str) -> list[str]:
+        """Split a bracketed LoT formula string into brackets and labels, ignoring whitespace and newlines."""
+        return re.findall(r"\(|\)|[^\s()]+", formula)
+
+    def __compile_tokens(
+        self, tokens: list[str], i: int
+    ) -> tuple[Callable[[tuple[int]], int], int]:
+        """Compile the subformula starting at tokens[i] into a function of the atom bitmasks.
+
+        Returns:
+            a tuple of the function and the index of the token after the subformula.
+        """
+        if i + 1 >= len(tokens) or tokens[i] != "(":
+            raise ValueError(f"Expected a bracketed subformula at token {i}: {tokens}")
+        label = tokens[i + 1]
+        i += 2
+        children = []
+        while i < len(tokens) and tokens[i] != ")":
+            child, i = self.__compile_tokens(tokens, i)
+            children.append(child)
+        if i == len(tokens):
+            raise ValueError(f"Unbalanced brackets in LoT formula: {tokens}")
+        i += 1
+
+        if not children:
+            if label not in self.atoms:
+                raise ValueError(f"Unknown atom {label} in LoT formula.")
+            return (operator.itemgetter(self.atoms.index(label)), i)
+        if label in ["+", "*"]:
+            combine = operator.or_ if label == "+" else operator.and_
+            return (lambda a: reduce(combine, [child(a) for child in children]), i)
+        if label == "-" and len(children) == 1:
+            # the complement within the bitmask of all points, atom 1
+            (child,) = children
+            top = self.atoms.index("1")
+            return (lambda a: a[top] ^ child(a), i)
+        raise ValueError(f"Invalid LoT operator {label} with {len(children)} operands.")
+
+    def __minimize(self, arr: np.ndarray) -> ExpressionTree:
+        """Find a short description of a meaning using the configured backend."""
+        if self.instrument:
+            self.stats = defaultdict(float)
+            start = time.perf_counter()
+
+        lower_bound = self.complexity_lower_bound(arr)
+        if self.backend == "portfolio":
+            result = self.__portfolio(arr, lower_bound)
+        elif self.minimizer is not None:
+            result = self.minimizer.minimize(arr, lower_bound)
+        else:
+            result = self.__joint_heuristic(arr, lower_bound)
+
+        if self.instrument:
+            self.stats["seconds"] = time.perf_counter() - start
+            self.stats["lower_bound"] = lower_bound
+            self.stats["gap"] = self.expression_complexity(result) - lower_bound
+            self.stats.update(getattr(self.minimizer, "last_stats", {}))
+            self.stats = dict(self.stats)
+        return result
+
+    def __make_minimizer(self, backend: str):
+        """Construct the minimizer for a backend, or None for the heuristic."""
+        if backend == "heuristic":
+            return None
+        # imported here because the minimizers build the ExpressionTrees defined above
+        if backend == "two_level":
+            from modals.modal_lot_minimization import TwoLevelMinimizer
+
+            return TwoLevelMinimizer(self.forces, self.flavors, self.contains_negation)
+        if backend == "egraph":
+            from modals.modal_lot_egraph import EGraphMinimizer
+
+            return EGraphMinimizer(self.forces, self.flavors, self.contains_negation)
+        raise ValueError(f"No LoT minimization backend named {backend}.")
+
+    def __portfolio(self, arr: np.ndarray, lower_bound=0) -> ExpressionTree:
+        """Run each backend of the portfolio in turn within a shared wall-clock budget, returning the shortest description.
+
+        Backends run in the configured order, so that fast exact backends go before the heuristic, whose search can take the whole budget on large meanings. Every backend checks the deadline as it searches and returns the best description it has found when it passes, so that no meaning takes much longer than the budget. The deadline is checked before each backend, skipping those not started in time, and the portfolio stops early once a description meets the lower bound. If no backend starts in time, e.g. with a budget of 0, the meaning's DNF is returned.
+        """
+        self.deadline = time.perf_counter() + self.budget
+        winner, result = "dnf", None
+        best = None
+        backends_run = 0
+        for name, minimizer in self.portfolio:
+            if time.perf_counter() >= self.deadline:
+                break
+            if minimizer is None:
+                candidate = self.__joint_heuristic(arr, lower_bound)
+            else:
+                minimizer.deadline = self.deadline
+                candidate = minimizer.minimize(arr, lower_bound)
+            backends_run += 1
+            complexity = self.expression_complexity(candidate)
+            if best is None or complexity < best:
+                winner, result, best = name, candidate, complexity
+            if best <= lower_bound:
+                break
+        self.deadline = None
+
+        if result is None:
+            result = self.__array_to_dnf(arr)
+        if self.instrument:
+            self.stats["portfolio_winner"] = winner
+            self.stats["portfolio_backends_run"] = backends_run
+        return result
+
+    def complexity_lower_bound(self, arr: np.ndarray) -> int:
+        """An admissible lower bound on the complexity of any LoT description of a meaning.
+
+        A formula's value at a point depends only on which of its atoms are true there, so all forces a formula does not mention must have identical rows in the meaning's array, and all flavors it does not mention must have identical columns. A description therefore needs at least (number of forces - size of the largest group of identical rows) force atoms, and similarly for flavors, each costing 2. A meaning needing no atoms is 0 or 1, costing 1.
+
+        Args:
+            arr: a numpy array representing the meaning points a modal can express.
+
+        Returns:
+            the lower bound on the value of expression_complexity for the meaning.
+        """
+        atoms = 0
+        for table in [arr, arr.T]:
+            lines = Counter(tuple(line) for line in table)
+            atoms += len(table) - max(lines.values())
+        return 2 * atoms if atoms else 1
+
+    def __apply(self, operation, *args) -> ExpressionTree:
+        """Apply a rewrite operation, timing it if instrumenting."""
+        if not self.instrument:
+            return operation(*args)
+        start = time.perf_counter()
+        result = operation(*args)
+        self.stats[f"time_{operation.__name__.strip('_')}"] += (
+            time.perf_counter() - start
+        )
+        return result
+
     #################################################################
     # Heuristic
     #################################################################
@@ -176,9 +460,12 @@ class ModalLOT:
         simple_operations: list,
         relative_operations: list,
         complement=False,
+        lower_bound=0,
     ) -> ExpressionTree:
         """A breadth first tree search of possible boolean formula reductions.
 
+        Each distinct formula is queued and expanded once. Children already visited, including those a rewrite leaves unchanged, are counted as duplicate_children when instrumenting.
+
         Args:
             e: an ExpressionTree representing the DNF expression to reduce
 
@@ -186,6 +473,8 @@ class ModalLOT:
 
             relative_operations: a list of functions from ExpressionTree to ExpressionTree, parametrized by an atom.
 
+            lower_bound: a lower bound on the complexity of any expression equivalent to e. The search stops as soon as it finds an expression meeting it, since that expression is optimal.
+
         Returns:
             shortest: the ExpressionTree representing the shortest expression found.
         """
@@ -197,44 +486,80 @@ class ModalLOT:
         )
 
         to_visit = [e]
+        # the formulas of every expression queued so far, so that each is expanded once
+        visited = {str(e)}
         shortest = e
         it = 0
         hard_ceiling = 2500  # Best solutions are likely before 1000 iterations
+        self.__best_iteration = 0
 
         while to_visit:
+            if self.expression_complexity(shortest) <= lower_bound:
+                break
             if it == hard_ceiling:
+                if self.instrument:
+                    self.stats["ceiling_hits"] += 1
+                break
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                if self.instrument:
+                    self.stats["deadline_hits"] += 1
                 break
             next = to_visit.pop(0)
 
-            children = [operation(next) for operation in simple_operations]
+            children = [
+                self.__apply(operation, next) for operation in simple_operations
+            ]
             children.extend(
-                operation(next, atom)
+                self.__apply(operation, next, atom)
                 for operation in relative_operations
                 for atom in atoms
             )
 
-            to_visit.extend([child for child in children if child != next])
+            new_children = []
+            for child in children:
+                key = str(child)
+                if key not in visited:
+                    visited.add(key)
+                    new_children.append(child)
+            to_visit.extend(new_children)
             it += 1
 
+            if self.instrument:
+                self.stats["nodes_expanded"] += 1
+                self.stats["duplicate_children"] += len(children) - len(new_children)
+
             if self.expression_complexity(next) < self.expression_complexity(shortest):
                 shortest = next
+                self.__best_iteration = it
 
         if complement and self.expression_complexity(shortest) != 1:
             return self.__negation(shortest)
 
         return shortest
 
-    def __joint_heuristic(self, arr: np.ndarray) -> ExpressionTree:
+    def __joint_heuristic(self, arr: np.ndarray, lower_bound=0) -> ExpressionTree:
         """
         Calls the boolean expression minimization heuristic twice, once
         to count 0s and once to count 1s. Returns the shorter result.
+        The second search is skipped if the first already meets the lower bound.
 
         Args:
             arr: a numpy array representing the meaning points a modal can express.
 
+            lower_bound: a lower bound on the complexity of any description of the meaning, e.g. from complexity_lower_bound.
+
         Returns:
             result: the ExpressionTree representing the shortest lot description
         """
+        if self.instrument:
+            for key in [
+                "nodes_expanded",
+                "duplicate_children",
+                "ceiling_hits",
+                "deadline_hits",
+            ]:
+                self.stats[key] = 0
+
         e = self.__array_to_dnf(arr)
         simple_operations = [
             self.__identity_a,
@@ -248,17 +573,35 @@ class ModalLOT:
             e_c = self.__array_to_dnf(arr, complement=True)
             simple_operations.append(self.__sum_complement)
             results = [
-                self.__heuristic(e, simple_operations, relative_operations),
                 self.__heuristic(
-                    e_c, simple_operations, relative_operations, complement=True
+                    e, simple_operations, relative_operations, lower_bound=lower_bound
                 ),
             ]
+            best_iterations = [self.__best_iteration]
+            if self.expression_complexity(results[0]) > lower_bound:
+                results.append(
+                    self.__heuristic(
+                        e_c,
+                        simple_operations,
+                        relative_operations,
+                        complement=True,
+                        lower_bound=lower_bound,
+                    )
+                )
+                best_iterations.append(self.__best_iteration)
             complexities = [self.expression_complexity(r) for r in results]
 
             result = results[np.argmin(complexities)]
+            best_iteration = best_iterations[np.argmin(complexities)]
 
         else:
-            result = self.__heuristic(e, simple_operations, relative_operations)
+            result = self.__heuristic(
+                e, simple_operations, relative_operations, lower_bound=lower_bound
+            )
+            best_iteration = self.__best_iteration
+
+        if self.instrument:
+            self.stats["best_iteration"] = best_iteration
 
         return result
 
@@ -315,13 +658,6 @@ class ModalLOT:
                 )
                 for pair in argw
             ]
-            negated_products = [
-                ExpressionTree(
-                    node=Nonterminal("-"),
-                    children=[product],
-                )
-                for product in products
-            ]
             return ExpressionTree(node=Nonterminal("+"), children=products)
 
     def __is_atom(self, ET: ExpressionTree) -> bool:
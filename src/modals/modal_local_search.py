@@ -0,0 +1,187 @@
+"""Local search optimizers for estimating the Pareto frontier of modal languages.
+
+Rather than evolving a population, each of a number of walkers descends a weighted sum (scalarisation) of the two normalized objectives, with weights evenly spread between x alone and y alone, so that together the walkers approach the whole frontier. At each step every walker draws a few neighbours, each one random modal mutation away from its language, and all walkers' neighbours are measured at once. Three strategies decide which neighbour a walker moves to:
+
+- hill_climbing: the best neighbour, if it improves on the walker's language
+- annealing: the best neighbour, accepted with the Metropolis criterion at a geometrically cooling temperature
+- tabu: the best neighbour not among the walker's recently visited languages, even if it is worse
+
+Since the walkers' scores are carried from step to step, only the neighbours are measured, and objectives other than complexity are computed once per distinct language, as in VectorizedModalOptimizer. A neighbour's complexity is a sum over its expressions, but its informativity depends on how all of its expressions share the meaning points, so neighbours are measured whole rather than from the changed expression. Every neighbour measured counts as explored, and the frontier is maintained over all of them.
+
+    Typical usage example:
+
+    optimizer = LocalSearchModalOptimizer(objectives, expressions, sample_size, max_mutations, generations, lang_size, method="annealing")
+    result = optimizer.fit(seed_population, id_start)
+"""
+
+import numpy as np
+from collections import deque
+from modals.modal_language import ModalLanguage
+from modals.modal_optimization import VectorizedModalOptimizer
+from modals.modal_pareto import ParetoArchive
+
+METHODS = ["hill_climbing", "annealing", "tabu"]
+
+
+class LocalSearchModalOptimizer(VectorizedModalOptimizer):
+    def __init__(
+        self,
+        *args,
+        method: str = "hill_climbing",
+        neighbours: int = 8,
+        temperature: float = 0.05,
+        tabu_size: int = 10,
+        **kwargs,
+    ):
+        """Initialize the optimizer with the parameters of VectorizedModalOptimizer, where generations is the number of steps of each walker, and:
+
+        Args:
+            method: one of 'hill_climbing', 'annealing' or 'tabu'
+
+            neighbours: the number of neighbours each walker draws per step. There are sample_size // neighbours walkers, so that each step measures about as many languages as a generation of the evolutionary algorithm.
+
+            temperature: the initial temperature of annealing, in units of the normalized scalarisation. It cools geometrically to a hundredth of that by the last step.
+
+            tabu_size: the number of recently visited languages a tabu walker may not return to
+        """
+        super().__init__(*args, **kwargs)
+        if method not in METHODS:
+            raise ValueError(
+                f"Unknown local search method '{method}'; expected one of {METHODS}."
+            )
+        self.method = method
+        self.neighbours = neighbours
+        self.temperature = temperature
+        self.tabu_size = tabu_size
+
+        # the strategies of choosing a neighbour, by method
+        self.methods = {
+            "hill_climbing": self.__climb,
+            "annealing": self.__anneal,
+            "tabu": self.__tabu,
+        }
+
+    def scalarize(
+        self,
+        scores: dict[str, np.ndarray],
+        weights: np.ndarray,
+        scale: list[tuple[float, float]],
+    ) -> np.ndarray:
+        """The weighted sum of x and y of each language, each normalized by the (lowest, range) in scale."""
+        (x_low, x_range), (y_low, y_range) = scale
+        x = (scores[self.x] - x_low) / x_range
+        y = (scores[self.y] - y_low) / y_range
+        return weights * x + (1 - weights) * y
+
+    def fit(
+        self,
+        seed_population: list[ModalLanguage],
+        id_start: int,
+        explore: float = 0.0,
+        seed: int = None,
+    ) -> dict:
+        """Run the walkers from languages of the seed population.
+
+        Args:
+            seed_population: the languages the walkers start from, drawn at random
+
+            id_start: the number of languages generated so far, used to name new languages
+
+            explore: unused, since each walker explores its own neighbourhood
+
+            seed: the seed of the numpy random Generator. If None, it is drawn from numpy's global random state.
+
+        Returns:
+            a dict of the "dominating_languages" among all explored languages, the distinct "explored_languages", the updated "id_start" and the number of "generations" (steps) run, as VectorizedModalOptimizer returns. With a patience, the run stops once the hypervolume of the frontier stops improving.
+        """
+        if seed is None:
+            seed = np.random.randint(2**32)
+        rng = np.random.default_rng(seed)
+
+        walkers = max(1, self.sample_size // self.neighbours)
+        P = self.encode(seed_population)
+        P = P[rng.choice(len(P), walkers, replace=len(P) < walkers)]
+        weights = np.linspace(0.0, 1.0, walkers) if walkers > 1 else np.array([0.5])
+
+        scores = self.measure(P)
+        scale = []
+        for name in [self.x, self.y]:
+            low, high = float(np.min(scores[name])), float(np.max(scores[name]))
+            scale.append((low, high - low if high > low else 1.0))
+        current = self.scalarize(scores, weights, scale)
+        # each walker's recently visited languages, for this run only
+        visited = [deque(maxlen=self.tabu_size) for _ in range(walkers)]
+        for recent, key in zip(visited, self.row_keys(P)):
+            recent.append(key)
+
+        explored = []
+        archive = ParetoArchive()
+        hypervolumes = []
+        reference = self.reference_point(scores)
+        done = 0
+        for step in range(self.generations):
+            if step:
+                # one random mutation of each walker's language per neighbour
+                N = self.mutate(
+                    np.repeat(P, self.neighbours, axis=0),
+                    np.ones(walkers * self.neighbours, dtype=np.int64),
+                    rng,
+                )
+                scores = self.measure(N)
+                values = self.scalarize(
+                    scores, np.repeat(weights, self.neighbours), scale
+                ).reshape(walkers, self.neighbours)
+                choice = self.methods[self.method](
+                    values, current, N, step, visited, rng
+                )
+                move = np.flatnonzero(choice >= 0)
+                P[move] = N[move * self.neighbours + choice[move]]
+                current[move] = values[move, choice[move]]
+            else:
+                N = P.copy()
+
+            explored.append(N)
+            dominating = self.unique_rows(N, self.dominating(scores))
+            for key, i in zip(self.row_keys(N[dominating]), dominating):
+                archive.insert(key, scores[self.x][i], scores[self.y][i])
+
+            done = step + 1
+            if self.patience:
+                hypervolumes.append(archive.hypervolume(reference))
+                if self.converged(hypervolumes, self.patience):
+                    break
+
+        result = self.results(explored, archive, id_start)
+        result["generations"] = done
+        return result
+
+    ##########################################################################
+    # Strategies
+    ##########################################################################
+
+    # Each strategy takes the (walkers, neighbours) matrix of the neighbours' scalarisations, the walkers' current scalarisations, the neighbours' rows, the step, the walkers' recently visited languages and the Generator, and returns the neighbour each walker moves to, or -1 for none.
+
+    def __climb(self, values, current, N, step, visited, rng) -> np.ndarray:
+        best = np.argmin(values, axis=1)
+        improves = values[np.arange(len(best)), best] < current
+        return np.where(improves, best, -1)
+
+    def __anneal(self, values, current, N, step, visited, rng) -> np.ndarray:
+        temperature = self.temperature * 0.01 ** (step / max(self.generations - 1, 1))
+        best = np.argmin(values, axis=1)
+        worsening = np.maximum(values[np.arange(len(best)), best] - current, 0)
+        accept = rng.random(len(best)) < np.exp(-worsening / temperature)
+        return np.where(accept, best, -1)
+
+    def __tabu(self, values, current, N, step, visited, rng) -> np.ndarray:
+        keys = np.array(self.row_keys(N), dtype=object).reshape(values.shape)
+        values = values.copy()
+        for w, recent in enumerate(visited):
+            for n, key in enumerate(keys[w]):
+                if key in recent:
+                    values[w, n] = np.inf
+        best = np.argmin(values, axis=1)
+        choice = np.where(np.isfinite(values[np.arange(len(best)), best]), best, -1)
+        for w in np.flatnonzero(choice >= 0):
+            visited[w].append(keys[w, choice[w]])
+        return choice
@@ -0,0 +1,370 @@
+"""An equality saturation (e-graph) minimizer for modal meanings, as an alternative backend for the modal language of thought.
+
+The heuristic in ModalLOT applies its rewrite rules (identities, force and flavor cover, factoring out of an atom, and sum complement) to whole trees, rebuilding each tree for each rewrite, so that the same subterms are rewritten many times across the branches of its search. An e-graph instead stores every equivalent term found so far compactly: terms are grouped into e-classes of equivalent terms, and each e-node points to e-classes rather than to terms. Each rule is applied once per e-node, and a rewrite of a subterm is immediately shared by every term containing it. Once no rule adds anything new (saturation), or a limit is reached, the lowest complexity term is extracted.
+
+Sums and products are n-ary with their children stored as sorted e-class ids, so that commutativity and associativity of the LoT operators need no rules.
+
+    Typical usage example:
+
+    minimizer = EGraphMinimizer(forces, flavors, negation=True)
+    tree = minimizer.minimize(arr)
+"""
+
+import time
+import numpy as np
+from nltk.grammar import Nonterminal
+from modals.modal_language_of_thought import ExpressionTree
+
+OPERATORS = ["+", "*", "-"]
+
+##############################################################################
+# EGraph
+##############################################################################
+
+
+class EGraph:
+    """A set of terms closed under congruence, stored as e-classes of e-nodes.
+
+    An e-node is a tuple (label, children), where label is an atom name or an operator in OPERATORS, and children is a tuple of e-class ids (sorted, without repeats, for sums and products).
+    """
+
+    def __init__(self):
+        self.parents = []  # union-find over e-class ids
+        self.hashcons = {}  # canonical e-node -> e-class id
+
+    def find(self, c: int) -> int:
+        """The canonical id of an e-class."""
+        while self.parents[c] != c:
+            self.parents[c] = self.parents[self.parents[c]]
+            c = self.parents[c]
+        return c
+
+    def canonicalize(self, node: tuple) -> tuple:
+        """Point an e-node's children at canonical e-class ids."""
+        label, children = node
+        children = [self.find(child) for child in children]
+        if label in ["+", "*"]:
+            children = sorted(set(children))
+        return (label, tuple(children))
+
+    def add(self, node: tuple) -> int:
+        """Add an e-node, returning the id of its e-class.
+
+        A sum or product of a single e-class is that e-class (idempotence).
+        """
+        node = self.canonicalize(node)
+        label, children = node
+        if label in ["+", "*"] and len(children) == 1:
+            return children[0]
+        if node in self.hashcons:
+            return self.find(self.hashcons[node])
+        c = len(self.parents)
+        self.parents.append(c)
+        self.hashcons[node] = c
+        return c
+
+    def union(self, a: int, b: int) -> bool:
+        """Merge two e-classes, returning whether they were distinct."""
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        self.parents[max(a, b)] = min(a, b)
+        return True
+
+    def rebuild(self) -> None:
+        """Restore the congruence invariant after unions: e-nodes that became identical must be in the same e-class."""
+        changed = True
+        while changed:
+            changed = False
+            hashcons = {}
+            for node, c in self.hashcons.items():
+                node = self.canonicalize(node)
+                label, children = node
+                c = self.find(c)
+                if label in ["+", "*"] and len(children) == 1:
+                    changed |= self.union(c, children[0])
+                    continue
+                if node in hashcons:
+                    changed |= self.union(hashcons[node], c)
+                hashcons[node] = self.find(c)
+            self.hashcons = hashcons
+
+    def classes(self) -> dict[int, list[tuple]]:
+        """The e-nodes of each e-class, by canonical e-class id."""
+        classes = {}
+        for node, c in self.hashcons.items():
+            classes.setdefault(self.find(c), []).append(node)
+        return classes
+
+    def __len__(self) -> int:
+        return len(self.hashcons)
+
+
+##############################################################################
+# Minimizer
+##############################################################################
+
+
+class EGraphMinimizer:
+    def __init__(self, forces: list[str], flavors: list[str], negation: bool):
+        """Initialize the minimizer for a meaning space.
+
+        Args:
+            forces: the modal force names, i.e. the rows of the table of modal variation
+
+            flavors: the modal flavor names, i.e. the columns of the table
+
+            negation: whether the LoT contains negation, enabling the sum complement rule and the description of a meaning as the negation of its complement.
+        """
+        self.forces = forces
+        self.flavors = flavors
+        self.negation = negation
+        # limits on saturation, after which the best term found so far is extracted
+        self.max_iterations = 30
+        self.max_nodes = 20000
+        # wall-clock time (time.perf_counter) after which saturation stops, or None
+        self.deadline = None
+        self.last_stats = {}
+
+    def minimize(self, arr: np.ndarray, lower_bound=0) -> ExpressionTree:
+        """Find a short description of a meaning by equality saturation.
+
+        The e-graph is seeded with the meaning's DNF and, if the LoT contains negation, the negated DNF of its complement, which are equivalent and so share an e-class.
+
+        Args:
+            arr: a numpy array representing the meaning points a modal can express.
+
+            lower_bound: a lower bound on the complexity of any description of the meaning. Saturation stops once a description meets it, or at the deadline.
+
+        Returns:
+            the ExpressionTree of the lowest complexity term found.
+        """
+        graph = EGraph()
+        root = self.__add_dnf(graph, arr)
+        if self.negation:
+            complement = self.__add_dnf(graph, arr == 0)
+            graph.union(root, graph.add(("-", (complement,))))
+            graph.rebuild()
+
+        iterations = 0
+        saturated = False
+        while iterations < self.max_iterations and len(graph) < self.max_nodes:
+            costs, _ = self.__extract(graph)
+            if costs[graph.find(root)] <= lower_bound:
+                break
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                break
+            iterations += 1
+            if not self.__apply_rules(graph):
+                saturated = True
+                break
+
+        costs, best = self.__extract(graph)
+        self.last_stats = {
+            "egraph_iterations": iterations,
+            "egraph_nodes": len(graph),
+            "egraph_saturated": saturated,
+        }
+        return self.__build_tree(graph, best, graph.find(root))
+
+    def __add_dnf(self, graph: EGraph, arr: np.ndarray) -> int:
+        """Add the Disjunctive Normal Form of the nonzero array entries, as in ModalLOT, returning its e-class."""
+        if not np.any(arr):
+            return graph.add(("0", ()))
+        if np.all(arr):
+            return graph.add(("1", ()))
+        products = [
+            graph.add(
+                (
+                    "*",
+                    (
+                        graph.add((self.forces[i], ())),
+                        graph.add((self.flavors[j], ())),
+                    ),
+                )
+            )
+            for i, j in np.argwhere(arr)
+        ]
+        return graph.add(("+", tuple(products)))
+
+    ##########################################################################
+    # Rewrite rules
+    ##########################################################################
+
+    def __apply_rules(self, graph: EGraph) -> bool:
+        """Apply every rule to every e-node once, then restore congruence.
+
+        Returns:
+            whether the e-graph changed.
+        """
+        classes = graph.classes()
+        atoms = {
+            c: {label for label, children in nodes if not children}
+            for c, nodes in classes.items()
+        }
+        size = len(graph)
+        unions = []
+
+        for c, nodes in classes.items():
+            for label, children in nodes:
+                if label == "+":
+                    for rewrite in self.__rewrite_sum(graph, classes, atoms, children):
+                        unions.append((c, rewrite))
+                elif label == "*":
+                    kept = [k for k in children if "1" not in atoms[k]]
+                    if len(kept) < len(children):
+                        # identity_m
+                        new = (
+                            graph.add(("*", tuple(kept)))
+                            if kept
+                            else self.__atom(graph, "1")
+                        )
+                        unions.append((c, new))
+
+        changed = len(graph) > size
+        for a, b in unions:
+            changed |= graph.union(a, b)
+        graph.rebuild()
+        return changed
+
+    def __rewrite_sum(
+        self, graph: EGraph, classes: dict, atoms: dict, children: tuple
+    ) -> list[int]:
+        """The e-classes equivalent to a sum of the e-classes `children`, by each rule applying to sums."""
+        rewrites = []
+        child_atoms = set().union(*[atoms[k] for k in children])
+
+        # identity_a
+        kept = [k for k in children if "0" not in atoms[k]]
+        if len(kept) < len(children):
+            rewrites.append(
+                graph.add(("+", tuple(kept))) if kept else self.__atom(graph, "0")
+            )
+
+        # force and flavor cover
+        if set(self.forces) <= child_atoms or set(self.flavors) <= child_atoms:
+            rewrites.append(self.__atom(graph, "1"))
+
+        # distributivity: factor an atom out of the products containing it
+        factors = set()
+        for k in children:
+            for label, grandchildren in classes[k]:
+                if label == "*":
+                    factors.update(*[atoms[g] for g in grandchildren])
+        for factor in sorted(factors):
+            factored = []
+            remaining = []
+            for k in children:
+                rest = self.__cofactor(classes, atoms, k, factor)
+                if rest is None:
+                    remaining.append(k)
+                else:
+                    factored.append(rest)
+            if len(factored) < 2:
+                continue
+            product = graph.add(
+                ("*", (self.__atom(graph, factor), graph.add(("+", tuple(factored)))))
+            )
+            rewrites.append(
+                graph.add(("+", tuple(remaining + [product]))) if remaining else product
+            )
+
+        # sum complement
+        if self.negation:
+            for axis in [self.forces, self.flavors]:
+                summed = [k for k in children if atoms[k] & set(axis)]
+                others = [k for k in children if not atoms[k] & set(axis)]
+                complement = [x for x in axis if not any(x in atoms[k] for k in summed)]
+                if summed and complement and len(complement) < len(summed):
+                    negated = graph.add(
+                        (
+                            "-",
+                            (
+                                graph.add(
+                                    (
+                                        "+",
+                                        tuple(
+                                            self.__atom(graph, x) for x in complement
+                                        ),
+                                    )
+                                ),
+                            ),
+                        )
+                    )
+                    rewrites.append(
+                        graph.add(("+", tuple(others + [negated])))
+                        if others
+                        else negated
+                    )
+
+        return rewrites
+
+    def __cofactor(self, classes: dict, atoms: dict, k: int, factor: str):
+        """If e-class k contains a product with the atom `factor` among its factors, the e-class of its other factor, otherwise None."""
+        for label, children in classes[k]:
+            if label == "*" and len(children) == 2:
+                first, second = children
+                if factor in atoms[first]:
+                    return second
+                if factor in atoms[second]:
+                    return first
+        return None
+
+    def __atom(self, graph: EGraph, name: str) -> int:
+        return graph.add((name, ()))
+
+    ##########################################################################
+    # Extraction
+    ##########################################################################
+
+    def __extract(self, graph: EGraph) -> tuple[dict, dict]:
+        """Find the lowest complexity e-node of every e-class, iterating to a fixed point.
+
+        Complexity is measured as in ModalLOT.expression_complexity: 1 for the atoms 0 and 1, 2 for other atoms, and the sum over children for operators.
+
+        Returns:
+            a tuple of dicts from e-class id to its lowest cost and to the e-node achieving it.
+        """
+        costs = {}
+        best = {}
+        changed = True
+        while changed:
+            changed = False
+            for node, c in graph.hashcons.items():
+                c = graph.find(c)
+                label, children = node
+                if not children:
+                    cost = 1 if label in ["0", "1"] else 2
+                elif all(child in costs for child in children):
+                    cost = sum(costs[child] for child in children)
+                else:
+                    continue
+                if c not in costs or cost < costs[c]:
+                    costs[c] = cost
+                    best[c] = node
+                    changed = True
+        return (costs, best)
+
+    def __build_tree(self, graph: EGraph, best: dict, c: int) -> ExpressionTree:
+        """Build the ExpressionTree of the lowest cost term of e-class c, with forces before flavors before compound terms."""
+        label, children = best[graph.find(c)]
+        if not children:
+            return ExpressionTree(label)
+
+        subtrees = [self.__build_tree(graph, best, child) for child in children]
+        subtrees.sort(key=self.__order)
+        if label == "*":
+            # multiplication is binary
+            tree = subtrees[-1]
+            for subtree in reversed(subtrees[:-1]):
+                tree = ExpressionTree(node=Nonterminal("*"), children=[subtree, tree])
+            return tree
+        return ExpressionTree(node=Nonterminal(label), children=subtrees)
+
+    def __order(self, tree: ExpressionTree) -> tuple:
+        label = tree.tree().label()
+        if label in self.forces:
+            return (0, self.forces.index(label), "")
+        if label in self.flavors:
+            return (1, self.flavors.index(label), "")
+        return (2, 0, str(tree))
@@ -0,0 +1,260 @@
+"""A two-level (Quine-McCluskey style) minimizer for modal meanings, as an alternative backend for the modal language of thought.
+
+A modal meaning is a boolean function of two one-hot variables, the force and the flavor. An implicant of such a function is a product of a sum of forces and a sum of flavors, i.e. a rectangle X x Y in the table of modal variation. The minimizer enumerates the implicant rectangles of a meaning, selects a cheapest cover of the meaning with them, and writes each rectangle in factored form, (* (sum of forces) (sum of flavors)), using the same LoT operators as the heuristic.
+
+Unlike the rewrite heuristic, it does not branch over sequences of rewrites, so it remains fast for meaning spaces with 4 or more forces and 5 or more flavors.
+
+    Typical usage example:
+
+    minimizer = TwoLevelMinimizer(forces, flavors, negation=True)
+    tree = minimizer.minimize(arr)
+"""
+
+import time
+import numpy as np
+from nltk.grammar import Nonterminal
+from modals.modal_language_of_thought import ExpressionTree
+
+
+class TwoLevelMinimizer:
+    def __init__(self, forces: list[str], flavors: list[str], negation: bool):
+        """Initialize the minimizer for a meaning space.
+
+        Args:
+            forces: the modal force names, i.e. the rows of the table of modal variation
+
+            flavors: the modal flavor names, i.e. the columns of the table
+
+            negation: whether the LoT contains negation, which allows sums to be written as the negation of their complement.
+        """
+        self.forces = forces
+        self.flavors = flavors
+        self.negation = negation
+        # limit on branch and bound nodes per meaning, after which the best cover found so far is used
+        self.max_nodes = 100000
+        # wall-clock time (time.perf_counter) after which the best cover found so far is used, or None
+        self.deadline = None
+
+    def minimize(self, arr: np.ndarray, lower_bound=0) -> ExpressionTree:
+        """Find the cheapest two-level description of a meaning.
+
+        If the LoT contains negation, the complement of the meaning is also minimized and negated, and the shorter of the two descriptions is returned, as in the heuristic.
+
+        Args:
+            arr: a numpy array representing the meaning points a modal can express.
+
+            lower_bound: a lower bound on the complexity of any description of the meaning. Searching stops once a description meets it.
+
+        Returns:
+            the ExpressionTree of the cheapest description found.
+        """
+        rows = [
+            sum(1 << j for j in range(len(self.flavors)) if arr[i, j])
+            for i in range(len(self.forces))
+        ]
+        result = self.__minimize_rows(rows, lower_bound)
+
+        out_of_time = self.deadline is not None and time.perf_counter() > self.deadline
+        if self.negation and result[0] > lower_bound and not out_of_time:
+            full = (1 << len(self.flavors)) - 1
+            cost, tree = self.__minimize_rows(
+                [full & ~row for row in rows], lower_bound
+            )
+            if cost != 1 and cost < result[0]:
+                result = (cost, ExpressionTree(node=Nonterminal("-"), children=[tree]))
+
+        return result[1]
+
+    ##########################################################################
+    # Implicants and covering
+    ##########################################################################
+
+    def __minimize_rows(
+        self, rows: list[int], lower_bound=0
+    ) -> tuple[int, ExpressionTree]:
+        """Minimize the meaning given by a flavor bitmask for each force.
+
+        Returns:
+            a tuple of the cost (LoT complexity) and the ExpressionTree of the cheapest cover.
+        """
+        full = (1 << len(self.flavors)) - 1
+        if not any(rows):
+            return (1, ExpressionTree("0"))
+        if all(row == full for row in rows):
+            return (1, ExpressionTree("1"))
+
+        implicants = self.implicant_rectangles(rows)
+        cells = self.__cells(rows)
+        cover = self.__cheapest_cover(cells, implicants, lower_bound)
+        terms = sorted(cover, key=lambda p: (p[2], p[0], p[1]))
+
+        trees = [self.__rectangle_tree(X, Y) for X, Y, _ in terms]
+        tree = (
+            trees[0]
+            if len(trees) == 1
+            else ExpressionTree(node=Nonterminal("+"), children=trees)
+        )
+        return (sum(p[2] for p in terms), tree)
+
+    def implicant_rectangles(self, rows: list[int]) -> list[tuple[int, int, int]]:
+        """Enumerate the rectangles X x Y contained in a meaning, keeping the cheapest rectangle for each set of cells.
+
+        Prime (maximal) rectangles alone do not suffice, because the cost of a sum is not monotone in its size: (* (strong ) (deontic )) is cheaper than the prime (* (strong ) (+ (deontic ) (circumstantial ))) when circumstantial is covered by another term. Every nonempty set of forces X is combined with every nonempty subset Y of the flavors shared by all forces in X.
+
+        Args:
+            rows: a flavor bitmask for each force.
+
+        Returns:
+            a list of (force bitmask, flavor bitmask, cost) triples.
+        """
+        cheapest = {}
+        for X in range(1, 1 << len(rows)):
+            shared = (1 << len(self.flavors)) - 1
+            for i, row in enumerate(rows):
+                if X >> i & 1:
+                    shared &= row
+            # iterate over the nonempty subsets of the shared flavors
+            Y = shared
+            while Y:
+                cost = self.__rectangle_cost(X, Y)
+                cells = self.__rectangle_cells(X, Y)
+                if cells not in cheapest or cost < cheapest[cells][2]:
+                    cheapest[cells] = (X, Y, cost)
+                Y = (Y - 1) & shared
+
+        return list(cheapest.values())
+
+    def __cells(self, rows: list[int]) -> int:
+        """The meaning as a single row-major bitmask of cells."""
+        width = len(self.flavors)
+        return sum(row << (i * width) for i, row in enumerate(rows))
+
+    def __rectangle_cells(self, X: int, Y: int) -> int:
+        """The row-major bitmask of the cells of rectangle X x Y."""
+        width = len(self.flavors)
+        return sum(Y << (i * width) for i in range(len(self.forces)) if X >> i & 1)
+
+    def __cheapest_cover(
+        self, cells: int, implicants: list[tuple], lower_bound=0
+    ) -> list[tuple]:
+        """Minimum cost cover of the cells by implicant rectangles, by branch and bound.
+
+        Starts from a greedy cover, then branches on the implicants covering the uncovered cell with the fewest covering implicants (Petrick's method without expanding the product of sums). The cheapest implicant covering any uncovered cell bounds the cost still to pay. The search stops early once a cover meets the lower bound, and is exact unless it exceeds max_nodes or the deadline, in which case the best cover found so far is returned.
+        """
+        implicants = [
+            (X, Y, cost, self.__rectangle_cells(X, Y)) for X, Y, cost in implicants
+        ]
+        covering = {}
+        remaining = cells
+        while remaining:
+            cell = remaining & -remaining
+            remaining ^= cell
+            covering[cell] = sorted(
+                [p for p in implicants if p[3] & cell], key=lambda p: p[2]
+            )
+
+        best = [0, self.__greedy_cover(cells, implicants)]
+        best[0] = sum(p[2] for p in best[1])
+        nodes = [0]
+
+        def search(uncovered: int, chosen: list, cost: int) -> None:
+            if best[0] <= lower_bound:
+                return
+            if not uncovered:
+                if cost < best[0]:
+                    best[0] = cost
+                    best[1] = list(chosen)
+                return
+            nodes[0] += 1
+            if nodes[0] > self.max_nodes:
+                return
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                return
+
+            # branch on the most constrained uncovered cell
+            candidates = None
+            bound = 0
+            remaining = uncovered
+            while remaining:
+                cell = remaining & -remaining
+                remaining ^= cell
+                bound = max(bound, covering[cell][0][2])
+                if candidates is None or len(covering[cell]) < len(candidates):
+                    candidates = covering[cell]
+            if cost + bound >= best[0]:
+                return
+
+            for implicant in candidates:
+                chosen.append(implicant)
+                search(uncovered & ~implicant[3], chosen, cost + implicant[2])
+                chosen.pop()
+
+        search(cells, [], 0)
+        return [p[:3] for p in best[1]]
+
+    def __greedy_cover(self, cells: int, implicants: list[tuple]) -> list[tuple]:
+        """Cover the cells by repeatedly choosing the implicant with the lowest cost per newly covered cell."""
+        cover = []
+        uncovered = cells
+        while uncovered:
+            implicant = min(
+                [p for p in implicants if p[3] & uncovered],
+                key=lambda p: p[2] / bin(p[3] & uncovered).count("1"),
+            )
+            cover.append(implicant)
+            uncovered &= ~implicant[3]
+        return cover
+
+    ##########################################################################
+    # Costs and trees
+    ##########################################################################
+
+    def __sum_cost(self, subset: int, size: int) -> int:
+        """The cost of a sum of atoms from an axis, or 0 if it is the whole axis (the multiplicative identity)."""
+        count = bin(subset).count("1")
+        if count == size:
+            return 0
+        if self.negation:
+            return 2 * min(count, size - count)
+        return 2 * count
+
+    def __rectangle_cost(self, X: int, Y: int) -> int:
+        """The LoT complexity of the factored form of rectangle X x Y."""
+        cost = self.__sum_cost(X, len(self.forces)) + self.__sum_cost(
+            Y, len(self.flavors)
+        )
+        return cost if cost else 1
+
+    def __sum_tree(self, subset: int, names: list[str]) -> ExpressionTree:
+        """The cheapest ExpressionTree for a sum of atoms from an axis, using negation of the complement if shorter."""
+        included = [name for i, name in enumerate(names) if subset >> i & 1]
+        excluded = [name for i, name in enumerate(names) if not subset >> i & 1]
+
+        if self.negation and len(excluded) < len(included):
+            return ExpressionTree(
+                node=Nonterminal("-"),
+                children=[self.__atoms_tree(excluded)],
+            )
+        return self.__atoms_tree(included)
+
+    def __atoms_tree(self, atoms: list[str]) -> ExpressionTree:
+        """A single atom, or the sum of several."""
+        if len(atoms) == 1:
+            return ExpressionTree(atoms[0])
+        return ExpressionTree(
+            node=Nonterminal("+"), children=[ExpressionTree(x) for x in atoms]
+        )
+
+    def __rectangle_tree(self, X: int, Y: int) -> ExpressionTree:
+        """The factored form of rectangle X x Y, omitting an axis that is fully covered."""
+        factors = []
+        if bin(X).count("1") != len(self.forces):
+            factors.append(self.__sum_tree(X, self.forces))
+        if bin(Y).count("1") != len(self.flavors):
+            factors.append(self.__sum_tree(Y, self.flavors))
+
+        if not factors:
+            return ExpressionTree("1")
+        if len(factors) == 1:
+            return factors[0]
+        return ExpressionTree(node=Nonterminal("*"), children=factors)
@@ -113,6 +113,42 @@ class ModalMeaningSpace(Universe):
         """
         return self.flavors.index(flavor)
 
+    def point_to_bit(self, point: ModalMeaningPoint) -> int:
+        """Converts a meaning point to its bit position in a meaning bitmask.
+
+        Bits are laid out row-major over the table of modal variation, i.e. the point (force_i, flavor_j) is bit i * len(flavors) + j.
+
+        Args:
+            - point: the ModalMeaningPoint to locate
+        """
+        return self.force_to_index(point.force) * len(self.flavors) + (
+            self.flavor_to_index(point.flavor)
+        )
+
+    def array_to_bitmask(self, a: np.ndarray) -> int:
+        """Converts a numpy array representing a modal meaning to an integer bitmask.
+
+        Args:
+            a: numpy array of shape (len(forces), len(flavors)), with nonzero entries for the points expressed.
+        """
+        mask = 0
+        for bit, value in enumerate(np.ravel(a)):
+            if value:
+                mask |= 1 << bit
+        return mask
+
+    def bitmask_to_array(self, mask: int) -> np.ndarray:
+        """Converts an integer bitmask to the numpy array representing the same modal meaning.
+
+        Args:
+            mask: an integer whose bit i * len(flavors) + j is set iff the point (force_i, flavor_j) is expressed.
+        """
+        a = np.array(self.arr)
+        for bit in range(a.size):
+            if mask >> bit & 1:
+                a[divmod(bit, len(self.flavors))] = 1
+        return a
+
     def get_df(self) -> pd.DataFrame:
         """Get a pandas DataFrame of the modal table of variation.
 
@@ -246,6 +282,22 @@ class ModalMeaning(Meaning):
             a[indices] = 1
         return a
 
+    def to_bitmask(self) -> int:
+        """Converts the set of points to an integer bitmask, using the layout of ModalMeaningSpace.point_to_bit.
+
+        Bitmasks are cheap to send between processes and to compare, hash and combine with bit operations.
+
+        Example usage:
+
+            m = Modal_Meaning({'weak+epistemic', 'weak+deontic'}, space)
+            m.to_bitmask()
+            3
+        """
+        mask = 0
+        for point in self.referents:
+            mask |= 1 << self.universe.point_to_bit(point)
+        return mask
+
     def to_df(self):
         """Converts to set of points to a pandas DataFrame.
 
@@ -1,7 +1,10 @@
 """Classes and functions for measuring the simplicity and informativeness of modal languages."""
 
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Callable
 from modals.modal_language import ModalExpression, ModalLanguage
-from modals.modal_language_of_thought import ExpressionTree, ModalLOT
+from modals.modal_language_of_thought import ModalLOT, HISTOGRAM_KEYS
 from modals.modal_meaning import ModalMeaningPoint
 
 ##############################################################################
@@ -11,13 +14,163 @@ from modals.modal_meaning import ModalMeaningPoint
 """Defines the complexity measures for measuring modals as minimum description length in a modal language of thought.
 """
 
+# The weights of each atom and operator type that reproduce ModalLOT.expression_complexity.
+DEFAULT_COMPLEXITY_WEIGHTS = {
+    "identity": 1,
+    "force": 2,
+    "flavor": 2,
+    "+": 0,
+    "*": 0,
+    "-": 0,
+}
 
-def language_complexity(language: ModalLanguage, mlot: ModalLOT) -> float:
-    """Sum of the language's item complexities."""
+
+def language_complexity(
+    language: ModalLanguage, mlot: ModalLOT, weights: dict[str, float] = None
+) -> float:
+    """Sum of the language's item complexities.
+
+    Args:
+        weights: optional weights of each atom and operator type (see HISTOGRAM_KEYS), defining a linear complexity measure over the items' histograms. If None, the LoT's own complexity is used.
+    """
+    if weights is not None:
+        histograms = np.array([item_histogram(e, mlot) for e in language.expressions])
+        return float(histograms.sum(axis=0) @ complexity_weights_vector(weights))
     return sum([item_complexity(e, mlot) for e in language.expressions])
 
 
 def item_complexity(item: ModalExpression, mlot: ModalLOT) -> int:
-    """Measure the complexity of a single item."""
-    return mlot.expression_complexity(ExpressionTree.from_string(item.lot_expression))
+    """Measure the complexity of a single item.
+
+    Uses the complexity precomputed when expressions were generated if available, and otherwise parses the item's LoT formula (memoised by the mlot).
+    """
+    if item.complexity is not None:
+        return item.complexity
+    return mlot.formula_complexity(item.lot_expression)
+
+
+def item_histogram(item: ModalExpression, mlot: ModalLOT) -> list[int]:
+    """The counts of each atom and operator type in an item's LoT formula, ordered as HISTOGRAM_KEYS.
+
+    Uses the histogram stored when expressions were generated if available, and otherwise counts the formula's tokens.
+    """
+    histogram = item.histogram
+    if histogram is None:
+        histogram = mlot.formula_histogram(item.lot_expression)
+    return [histogram[key] for key in HISTOGRAM_KEYS]
+
+
+def item_complexities(
+    expressions: list[ModalExpression],
+    mlot: ModalLOT,
+    weights: dict[str, float] = None,
+) -> np.ndarray:
+    """The complexity of each expression as a vector, so that the complexity of a language is a sum over its entries.
+
+    Args:
+        weights: optional weights of each atom and operator type, as in language_complexity.
+    """
+    if weights is not None:
+        histograms = np.array([item_histogram(e, mlot) for e in expressions])
+        return histograms @ complexity_weights_vector(weights)
+    return np.array([item_complexity(e, mlot) for e in expressions], dtype=float)
+
+
+def complexity_weights_vector(weights: dict[str, float]) -> np.ndarray:
+    """Convert a dict of weights of atom and operator types to a vector ordered as HISTOGRAM_KEYS. Missing types have weight 0."""
+    return np.array([weights.get(key, 0) for key in HISTOGRAM_KEYS], dtype=float)
+
+
+def language_histograms(languages: list[ModalLanguage], mlot: ModalLOT) -> np.ndarray:
+    """The summed item histograms of each language, as a matrix of shape (len(languages), len(HISTOGRAM_KEYS)).
+
+    Any linear complexity measure over a population of languages is then one matrix product, e.g. for a matrix W of shape (len(HISTOGRAM_KEYS), number of weightings), `language_histograms(languages, mlot) @ W` gives the complexity of every language under every weighting.
+    """
+    histograms = np.zeros((len(languages), len(HISTOGRAM_KEYS)), dtype=int)
+    for i, language in enumerate(languages):
+        for e in language.expressions:
+            histograms[i] += item_histogram(e, mlot)
+    return histograms
+
+
+def linear_complexities(
+    languages: list[ModalLanguage],
+    mlot: ModalLOT,
+    weights: list[dict[str, float]],
+) -> np.ndarray:
+    """Measure the complexity of every language under each of several weightings of atom and operator types.
+
+    Args:
+        languages: the list of ModalLanguages to measure
+
+        mlot: the ModalLOT, used for items without a stored histogram
+
+        weights: a list of dicts of weights, e.g. [DEFAULT_COMPLEXITY_WEIGHTS, {'identity': 1, 'force': 1, 'flavor': 1}]
+
+    Returns:
+        a matrix of shape (len(languages), len(weights)) of complexities.
+    """
+    W = np.stack([complexity_weights_vector(w) for w in weights], axis=1)
+    return language_histograms(languages, mlot) @ W
+
+
+##############################################################################
+# Memoised measures
+##############################################################################
+
+
+class LanguageMeasureMemo:
+    """A bounded least-recently-used memo of measures of languages, keyed by ModalLanguage.fingerprint.
+
+    Several objectives can share one memo, e.g. comm_cost and informativity both use the memoised informativity, so that each measure is computed at most once per distinct language until it is evicted.
+
+    Example usage:
+
+        memo = LanguageMeasureMemo({"complexity": complexity_measure}, maxsize=100000)
+        memo("complexity", language)
+    """
+
+    def __init__(self, measures: dict[str, Callable], maxsize: int = 100000):
+        """
+        Args:
+            measures: a dict from measure names to functions from a ModalLanguage to a value
+
+            maxsize: the maximum number of languages to remember the measures of
+        """
+        self.measures = measures
+        self.maxsize = maxsize
+        self.memo = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, name: str, language: ModalLanguage):
+        """Return the named measure of the language, computing it only if it is not memoised."""
+        return self.get(
+            name, language.fingerprint(), lambda: self.measures[name](language)
+        )
+
+    def get(self, name: str, key: tuple[int], compute: Callable[[], Any]):
+        """Return the value memoised under a name for a language's fingerprint, calling compute only if there is none.
+
+        This lets callers holding a language's fingerprint but not the language, e.g. as a row of expression indices, build it only when a value must be computed. Values need not be of the memo's measures, e.g. objectives derived from them.
+        """
+        values = self.memo.get(key)
+        if values is None:
+            values = {}
+            self.memo[key] = values
+            if len(self.memo) > self.maxsize:
+                self.memo.popitem(last=False)
+        else:
+            self.memo.move_to_end(key)
+
+        if name in values:
+            self.hits += 1
+        else:
+            self.misses += 1
+            values[name] = compute()
+        return values[name]
 
+    def __str__(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"{self.hits} of {total} measurements served from memo ({rate:.1%}), {len(self.memo)} languages memoised"
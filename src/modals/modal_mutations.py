@@ -3,7 +3,7 @@
 import random
 
 from altk.effcomm.optimization import Mutation
-from modals.modal_language import ModalExpression, ModalLanguage
+from modals.modal_language import ModalExpression, ModalExpressionIndex, ModalLanguage
 from modals.modal_meaning import ModalMeaning
 
 ##############################################################################
@@ -14,6 +14,13 @@ from modals.modal_meaning import ModalMeaning
 class Add_Modal(Mutation):
     """Add a random modal to the language."""
 
+    def __init__(self, index: ModalExpressionIndex = None):
+        """
+        Args:
+            index: the index of the expressions passed to mutate by meaning. If None, it is built from the expressions on the first mutation, which assumes the same expressions are passed each time.
+        """
+        self.index = index
+
     def precondition(self, language: ModalLanguage, **kwargs) -> bool:
         """Only add a modal if the language size is not at maximum."""
         lang_size = kwargs["lang_size"]
@@ -22,11 +29,26 @@ class Add_Modal(Mutation):
     def mutate(
         self, language: ModalLanguage, expressions: list[ModalExpression]
     ) -> ModalLanguage:
-        """Add a random new modal to the language."""
-        new_expression = random.choice(expressions)
-        while new_expression in language:
-            new_expression = random.choice(expressions)
-        language.add_expression(new_expression)
+        """Add a random new modal to the language.
+
+        The modal is drawn uniformly from the expressions whose meaning the language does not already express, without rejection sampling: a random rank among the remaining expressions is shifted past the positions of the excluded ones.
+        """
+        if self.index is None:
+            self.index = ModalExpressionIndex(expressions)
+        excluded = sorted(
+            position
+            for mask in language.meaning_ids
+            for position in self.index.positions.get(mask, [])
+        )
+        if len(excluded) == len(expressions):
+            raise ValueError("the language already expresses every possible meaning")
+
+        position = random.randrange(len(expressions) - len(excluded))
+        for excluded_position in excluded:
+            if excluded_position > position:
+                break
+            position += 1
+        language.add_expression(expressions[position])
         return language
 
 
@@ -58,18 +80,16 @@ class Add_Point(Add_Modal):
     ) -> ModalLanguage:
         """Add a new expression to the language containing exactly one random meaning point, preferably one not already expressed by the language."""
 
-        # add a random meaning point to an existing expression
-        point = random.choice(list(language.universe.referents))
-        if uncovered_points(language):
-            point = random.choice(list(uncovered_points(language)))
+        # add a random meaning point, preferring points the language does not cover
+        num_points = len(language.universe.referents)
+        uncovered = ((1 << num_points) - 1) & ~language.coverage
+        candidates = uncovered if uncovered else (1 << num_points) - 1
+        bit = random.choice([b for b in range(num_points) if candidates >> b & 1])
 
-        # Search for the correct expression
-        new_meaning = [point]
-        new_expression = None
-        for e in expressions:
-            points_ = e.meaning.referents
-            if set(points_) == set(new_meaning):
-                new_expression = e
+        # Look up the expression whose meaning is just that point
+        if self.index is None:
+            self.index = ModalExpressionIndex(expressions)
+        new_expression = self.index.get(1 << bit)
 
         if new_expression is None:
             raise ValueError("new meaning not found in set of possible meanings")
@@ -82,48 +102,51 @@ class Add_Point(Add_Modal):
 class Remove_Point(Mutation):
     """Replace an ambiguous modal with a modal expressing one fewer meaning points. Designed to increase informativity."""
 
+    def __init__(self, index: ModalExpressionIndex = None):
+        """
+        Args:
+            index: the index of the expressions passed to mutate by meaning. If None, it is built from the expressions on the first mutation, which assumes the same expressions are passed each time.
+        """
+        self.index = index
+
     def precondition(self, language: ModalLanguage, **kwargs) -> bool:
         """Only apply when the language has a modal that expresses more than one meaning point."""
-        # Can express more than one pointe
-        expressions = language.expressions
-        for expression in expressions:
-            points = expression.meaning.referents
-            if len(points) > 1:
-                return True
-        return False
+        return language.num_ambiguous > 0
 
     def mutate(
         self, language: ModalLanguage, expressions: list[ModalExpression]
     ) -> ModalLanguage:
         """Choose a random modal from the langauge and replace it with a modal that is less ambiguous by point point."""
-        # randomly select an modal with more than one meaning
-        vocab = language.expressions.copy()
-        random.shuffle(vocab)
+        # randomly select the position of a modal with more than one meaning
+        positions = list(range(len(language.expressions)))
+        random.shuffle(positions)
 
-        expression_to_remove = None
-        for expression in vocab:
-            points = list(expression.meaning.referents)
+        position = None
+        for i in positions:
+            points = list(language.expressions[i].meaning.referents)
             if len(points) > 1:
-                expression_to_remove = expression
+                position = i
                 break
 
-        if expression_to_remove is None:
+        if position is None:
             return language
 
-        # randomly remove a meaning point
+        # randomly remove a meaning point, i.e. clear its bit
         point = random.choice(points)
-        points.remove(point)
+        meaning = language.expressions[position].meaning
+        mask = meaning.to_bitmask() & ~(1 << meaning.universe.point_to_bit(point))
 
-        # Search for the correct expression
-        for e in expressions:
-            points_ = e.meaning.referents
-            if set(points) == set(points_):
-                new_expression = e
-                break
+        # Look up the expression with the remaining points
+        if self.index is None:
+            self.index = ModalExpressionIndex(expressions)
+        new_expression = self.index.get(mask)
 
-        # Replace the ambiguous expression with the more precise one
-        language.expressions.remove(expression_to_remove)
+        if new_expression is None:
+            raise ValueError("new meaning not found in set of possible meanings")
+
+        # Replace the ambiguous expression with the more precise one, adding first so the language is never empty. Adding a synonym renames (and copies) the expressions, so the ambiguous one is removed by its position, which adding at the end keeps.
         language.add_expression(new_expression)
+        language.pop(position)
         return language
 
 
@@ -134,6 +157,14 @@ class Interchange_Modal(Mutation):
     Requires creating Add_Modal and Remove_Modal mutations as instance attributes.
     """
 
+    def __init__(self, index: ModalExpressionIndex = None):
+        """
+        Args:
+            index: the index of expressions by meaning, passed on to Add_Modal.
+        """
+        self.add = Add_Modal(index)
+        self.remove = Remove_Modal()
+
     def precondition(self, language: ModalLanguage, **kwargs) -> bool:
         """Always applies."""
         return True
@@ -142,14 +173,15 @@ class Interchange_Modal(Mutation):
         self, language: ModalLanguage, expressions: list[ModalExpression]
     ) -> ModalLanguage:
         """Removes and then adds a random expresion."""
-        add = Add_Modal()
-        remove = Remove_Modal()
-        return remove.mutate(add.mutate(language, expressions), expressions)
+        return self.remove.mutate(self.add.mutate(language, expressions), expressions)
 
 
 def uncovered_points(language: ModalLanguage) -> set[ModalMeaning]:
     """Helper function for AddPoint to get the list of meanings not expressible in a language."""
     # Check for any points not expressed
-    points = [point for e in language.expressions for point in e.meaning.referents]
-    space = language.universe.referents
-    return set(space) - set(points)
+    space = language.universe
+    return {
+        point
+        for point in space.referents
+        if not language.coverage >> space.point_to_bit(point) & 1
+    }
@@ -0,0 +1,573 @@
+"""A vectorized evolutionary algorithm for estimating the Pareto frontier of modal languages.
+
+altk's EvolutionaryOptimizer mutates and measures ModalLanguage objects one at a time. This optimizer instead holds each generation as a matrix of expression indices, one row per language, padded with -1, and applies the modal mutations (Add_Modal, Remove_Modal, Add_Point, Remove_Point and Interchange_Modal) to all rows at once with numpy. Objectives are measured once per distinct language of each batch, complexity as a batched sum of item complexities, and languages are only built as ModalLanguages for measuring informativity and for the results. Objective values are memoised across batches only in an optional bounded LanguageMeasureMemo, looked up by the fingerprint of each row's meanings, so that a language is only built as a ModalLanguage when a value must be computed.
+
+It follows the same generational scheme as altk's optimizer: each generation is measured and explored, its non-dominated languages are the parents of the next generation, and the remaining places are filled by mutating copies of the parents.
+
+    Typical usage example:
+
+    optimizer = VectorizedModalOptimizer(objectives, expressions, sample_size, max_mutations, generations, lang_size, item_complexities=c)
+    result = optimizer.fit(seed_population, id_start)
+"""
+
+import os
+import json
+import numpy as np
+from typing import Callable
+from modals.modal_language import ModalExpression, ModalLanguage
+from modals.modal_measures import LanguageMeasureMemo
+from modals.modal_pareto import non_dominated_indices, ParetoArchive
+
+# The mutations, in the order of the columns of precondition matrices
+MUTATIONS = [
+    "Add_Modal",
+    "Remove_Modal",
+    "Add_Point",
+    "Remove_Point",
+    "Interchange_Modal",
+]
+
+
+class VectorizedModalOptimizer:
+    def __init__(
+        self,
+        objectives: dict[str, Callable[[ModalLanguage], float]],
+        expressions: list[ModalExpression],
+        sample_size: int,
+        max_mutations: int,
+        generations: int,
+        lang_size: int,
+        item_complexities: np.ndarray = None,
+        x: str = "comm_cost",
+        y: str = "complexity",
+        patience: int = 0,
+        tolerance: float = 0.0,
+        memo: LanguageMeasureMemo = None,
+    ):
+        """Initialize the optimizer, with the same parameters as altk's EvolutionaryOptimizer.
+
+        Args:
+            objectives: a dict from objective names to functions from a ModalLanguage to a float. Each is called at most once per distinct language in a batch, and once per language in the memo if one is given.
+
+            expressions: the list of all possible ModalExpressions, one per meaning
+
+            sample_size: the number of languages in each generation
+
+            max_mutations: the maximum number of mutations applied to each new language
+
+            generations: the number of generations
+
+            lang_size: the maximum number of expressions in a language
+
+            item_complexities: optional complexity of each expression. If given, the 'complexity' and 'simplicity' objectives are measured for whole generations at once as sums of item complexities.
+
+            x: the first objective to minimize
+
+            y: the second objective to minimize
+
+            patience: the number of generations over which the hypervolume of the frontier must improve by more than the tolerance, after which a run stops early; or 0 to always run every generation
+
+            tolerance: the smallest relative improvement of the hypervolume over the patience window that counts as progress
+
+            memo: an optional bounded memo to keep objective values in, under the objectives' names, e.g. the memo the objectives measure with
+        """
+        self.objectives = objectives
+        self.expressions = expressions
+        self.sample_size = sample_size
+        self.max_mutations = max_mutations
+        self.generations = generations
+        self.lang_size = lang_size
+        self.item_complexities = item_complexities
+        self.x = x
+        self.y = y
+        self.patience = patience
+        self.tolerance = tolerance
+        self.memo = memo
+        # an optional function each explored language is passed to by results, one at a time, instead of returning them all
+        self.on_explored = None
+
+        space = expressions[0].meaning.universe
+        self.num_points = len(space.referents)
+        if self.num_points > 62:
+            raise ValueError(
+                f"Meaning bitmasks of {self.num_points} points do not fit in int64."
+            )
+        self.full = (1 << self.num_points) - 1
+
+        self.masks = np.array(
+            [e.meaning.to_bitmask() for e in expressions], dtype=np.int64
+        )
+        self.order = np.argsort(self.masks, kind="stable")
+        self.sorted_masks = self.masks[self.order]
+        self.ambiguous = self.__popcount(self.masks) > 1
+        # the expression expressing exactly each point, by bit
+        self.singletons = self.lookup(
+            np.int64(1) << np.arange(self.num_points, dtype=np.int64)
+        )
+
+        # the vectorized mutations, in the order of MUTATIONS
+        self.mutations = [
+            self.__add_modal,
+            self.__remove_modal,
+            self.__add_point,
+            self.__remove_point,
+            self.__interchange_modal,
+        ]
+
+    def __getstate__(self) -> dict:
+        # on_explored stays in the process that set it, e.g. when islands pickle the optimizer to run in processes of their own
+        state = self.__dict__.copy()
+        state["on_explored"] = None
+        return state
+
+    ##########################################################################
+    # Encoding
+    ##########################################################################
+
+    def lookup(self, masks: np.ndarray) -> np.ndarray:
+        """The indices of the expressions with each meaning bitmask, or -1 where there is none."""
+        positions = np.searchsorted(self.sorted_masks, masks)
+        positions = np.minimum(positions, len(self.sorted_masks) - 1)
+        found = self.sorted_masks[positions] == masks
+        return np.where(found, self.order[positions], -1)
+
+    def encode(self, languages: list[ModalLanguage]) -> np.ndarray:
+        """Convert languages to a matrix of expression indices, left-aligned and padded with -1.
+
+        The matrix has one spare column, since Interchange_Modal adds an expression before removing one.
+        """
+        P = np.full((len(languages), self.lang_size + 1), -1, dtype=np.int64)
+        for i, language in enumerate(languages):
+            indices = self.lookup(
+                np.array([e.meaning.to_bitmask() for e in language.expressions])
+            )
+            if np.any(indices < 0):
+                raise ValueError("language has an expression with no possible meaning")
+            P[i, : len(indices)] = indices
+        return P
+
+    def decode(self, row: np.ndarray) -> ModalLanguage:
+        """Convert a row of expression indices to a ModalLanguage."""
+        return ModalLanguage([self.expressions[i] for i in row if i >= 0])
+
+    def row_keys(self, P: np.ndarray) -> list[bytes]:
+        """A canonical key for each row: its sorted expression indices."""
+        return [row.tobytes() for row in np.sort(P, axis=1)]
+
+    def unique_rows(self, P: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        """The indices of the first row of each distinct language among P[indices]."""
+        first = {}
+        for i, key in zip(indices, self.row_keys(P[indices])):
+            first.setdefault(key, i)
+        return np.array(list(first.values()), dtype=np.int64)
+
+    ##########################################################################
+    # Mutations
+    ##########################################################################
+
+    def mutate(
+        self,
+        P: np.ndarray,
+        num_mutations: np.ndarray,
+        rng: np.random.Generator,
+        weights: np.ndarray = None,
+    ) -> np.ndarray:
+        """Apply num_mutations[i] random mutations to row i of P in place.
+
+        In each round, every row still to be mutated gets one mutation, chosen uniformly among those whose precondition holds, as in altk.
+
+        Args:
+            weights: optional positive weights of each mutation (column, ordered as MUTATIONS) for each row, so that each applicable mutation is chosen with probability proportional to its weight instead of uniformly
+        """
+        for step in range(num_mutations.max(initial=0)):
+            rows = np.flatnonzero(num_mutations > step)
+            preconditions = self.preconditions(P[rows])
+            # a random applicable mutation per row: the largest of uniform draws is uniform, and of draws raised to 1 / weight is proportional to the weights
+            draws = rng.random(preconditions.shape)
+            if weights is not None:
+                draws = draws ** (1 / weights[rows])
+            choice = np.argmax(draws * preconditions, axis=1)
+            choice[~preconditions.any(axis=1)] = -1
+
+            for m, mutation in enumerate(self.mutations):
+                selected = rows[choice == m]
+                if len(selected):
+                    mutation(P, selected, rng)
+        return P
+
+    def preconditions(self, P: np.ndarray) -> np.ndarray:
+        """A boolean matrix of whether each mutation (column, ordered as MUTATIONS) applies to each row."""
+        sizes = (P >= 0).sum(axis=1)
+        can_add = self.__num_distinct(P) < len(self.expressions)
+        ambiguous = (self.ambiguous[P] & (P >= 0)).any(axis=1)
+        return np.stack(
+            [
+                (sizes < self.lang_size) & can_add,
+                sizes > 1,
+                sizes < self.lang_size,
+                ambiguous,
+                can_add,
+            ],
+            axis=1,
+        )
+
+    def __add_modal(self, P: np.ndarray, rows: np.ndarray, rng) -> None:
+        """Add a uniformly random expression whose meaning the language lacks.
+
+        A random rank among the missing expressions is shifted past the sorted indices of the language's expressions, as in Add_Modal.
+        """
+        num_expressions = len(self.expressions)
+        excluded = np.where(P[rows] >= 0, P[rows], num_expressions)
+        excluded.sort(axis=1)
+        # ignore repeats of synonyms
+        repeats = np.zeros_like(excluded, dtype=bool)
+        repeats[:, 1:] = excluded[:, 1:] == excluded[:, :-1]
+        excluded[repeats] = num_expressions
+        excluded.sort(axis=1)
+
+        num_excluded = (excluded < num_expressions).sum(axis=1)
+        new = (rng.random(len(rows)) * (num_expressions - num_excluded)).astype(
+            np.int64
+        )
+        for j in range(excluded.shape[1]):
+            new += excluded[:, j] <= new
+        self.__append(P, rows, new)
+
+    def __remove_modal(self, P: np.ndarray, rows: np.ndarray, rng) -> None:
+        """Remove a uniformly random expression, moving the last expression into its place."""
+        last = (P[rows] >= 0).sum(axis=1) - 1
+        position = (rng.random(len(rows)) * (last + 1)).astype(np.int64)
+        P[rows, position] = P[rows, last]
+        P[rows, last] = -1
+
+    def __add_point(self, P: np.ndarray, rows: np.ndarray, rng) -> None:
+        """Add the expression of a single random point, preferably one the language does not cover."""
+        coverage = np.bitwise_or.reduce(self.__row_masks(P[rows]), axis=1)
+        uncovered = self.full & ~coverage
+        candidates = np.where(uncovered != 0, uncovered, self.full)
+        bit = self.__random_bit(candidates, rng)
+        new = self.singletons[bit]
+        if np.any(new < 0):
+            raise ValueError("new meaning not found in set of possible meanings")
+        self.__append(P, rows, new)
+
+    def __remove_point(self, P: np.ndarray, rows: np.ndarray, rng) -> None:
+        """Replace a random ambiguous expression with the expression of its meaning minus a random point."""
+        ambiguous = self.ambiguous[P[rows]] & (P[rows] >= 0)
+        position = np.argmax(rng.random(ambiguous.shape) * ambiguous, axis=1)
+        masks = self.masks[P[rows, position]]
+        bit = self.__random_bit(masks, rng)
+        new = self.lookup(masks & ~(np.int64(1) << bit))
+        if np.any(new < 0):
+            raise ValueError("new meaning not found in set of possible meanings")
+        P[rows, position] = new
+
+    def __interchange_modal(self, P: np.ndarray, rows: np.ndarray, rng) -> None:
+        """Add and then remove a random expression."""
+        self.__add_modal(P, rows, rng)
+        self.__remove_modal(P, rows, rng)
+
+    def __append(self, P: np.ndarray, rows: np.ndarray, new: np.ndarray) -> None:
+        P[rows, (P[rows] >= 0).sum(axis=1)] = new
+
+    def __row_masks(self, P: np.ndarray) -> np.ndarray:
+        return np.where(P >= 0, self.masks[P], 0)
+
+    def __random_bit(self, masks: np.ndarray, rng) -> np.ndarray:
+        """A uniformly random set bit of each (nonzero) mask."""
+        bits = (masks[:, None] >> np.arange(self.num_points)) & 1
+        return np.argmax(rng.random(bits.shape) * bits, axis=1)
+
+    def __num_distinct(self, P: np.ndarray) -> np.ndarray:
+        S = np.sort(P, axis=1)
+        new = np.ones_like(S, dtype=bool)
+        new[:, 1:] = S[:, 1:] != S[:, :-1]
+        return (new & (S >= 0)).sum(axis=1)
+
+    def __popcount(self, masks: np.ndarray) -> np.ndarray:
+        return ((masks[:, None] >> np.arange(63)) & 1).sum(axis=1)
+
+    ##########################################################################
+    # Measuring and selection
+    ##########################################################################
+
+    def measure(self, P: np.ndarray) -> dict[str, np.ndarray]:
+        """Measure every objective for every row of P.
+
+        Complexity and simplicity are batched sums of item complexities if these were given. The other objectives are computed once per distinct language in P, unless they are in the memo.
+        """
+        batched = {}
+        if self.item_complexities is not None:
+            complexity = np.where(P >= 0, self.item_complexities[P], 0).sum(axis=1)
+            batched = {"complexity": complexity, "simplicity": 1 / complexity}
+
+        names = [name for name in self.objectives if name not in batched]
+        keys = self.row_keys(P)
+        values = {}
+        for key, row in zip(keys, P):
+            if key in values:
+                continue
+            if self.memo is None:
+                language = self.decode(row)
+                values[key] = {name: self.objectives[name](language) for name in names}
+            else:
+                fingerprint = tuple(sorted(self.masks[row[row >= 0]].tolist()))
+                values[key] = {
+                    name: self.memo.get(name, fingerprint, self.__measurer(name, row))
+                    for name in names
+                }
+
+        scores = {
+            name: np.array([values[key][name] for key in keys], dtype=float)
+            for name in names
+        }
+        scores.update(
+            {
+                name: values
+                for name, values in batched.items()
+                if name in self.objectives
+            }
+        )
+        return scores
+
+    def __measurer(self, name: str, row: np.ndarray) -> Callable[[], float]:
+        """A function measuring an objective of the language of a row, for the memo to call on a miss."""
+        return lambda: self.objectives[name](self.decode(row))
+
+    def dominating(self, scores: dict[str, np.ndarray]) -> np.ndarray:
+        """The indices of the rows not dominated in (x, y), both minimized."""
+        return non_dominated_indices(scores[self.x], scores[self.y])
+
+    def sample_mutated(self, parents: np.ndarray, rng) -> np.ndarray:
+        """Fill a generation of sample_size rows with mutated copies of the parents, followed by the parents themselves.
+
+        As in altk, each parent gets an equal number of copies, each with between 1 and max_mutations mutations, and any remaining places get a single mutation of a random parent.
+        """
+        amount = max(self.sample_size - len(parents), 0)
+        per_parent, remainder = divmod(amount, len(parents))
+        sources = np.concatenate(
+            [
+                np.repeat(np.arange(len(parents)), per_parent),
+                rng.integers(len(parents), size=remainder),
+            ]
+        )
+        num_mutations = np.concatenate(
+            [
+                rng.integers(1, self.max_mutations + 1, size=len(parents) * per_parent),
+                np.ones(remainder, dtype=np.int64),
+            ]
+        )
+        children = self.mutate(parents[sources].copy(), num_mutations, rng)
+        return np.concatenate([children, parents])
+
+    ##########################################################################
+    # Checkpoints
+    ##########################################################################
+
+    def save_checkpoint(
+        self,
+        fn: str,
+        generation: int,
+        P: np.ndarray,
+        explored: list[np.ndarray],
+        archive: ParetoArchive,
+        rng: np.random.Generator,
+        convergence: dict = None,
+    ) -> None:
+        """Save the state of a run to a compressed .npz file, replacing any previous checkpoint only once the new one is complete.
+
+        The state is the number of generations run, the next population, all explored rows, the rows in the archive, the state of the random Generator and the hypervolume history, so that resuming continues exactly as the uninterrupted run would. Objective values are not saved, as they are measured again on resuming.
+        """
+        width = self.lang_size + 1
+        arrays = {
+            "generation": np.array(generation),
+            "population": P,
+            "explored": np.concatenate(explored).reshape(-1, width),
+            "archive": self.__rows(archive.items(), width),
+            "rng_state": np.array(json.dumps(rng.bit_generator.state)),
+            "convergence": np.array(json.dumps(convergence)),
+        }
+
+        temp_fn = f"{fn}.tmp.npz"
+        np.savez_compressed(temp_fn, **arrays)
+        os.replace(temp_fn, fn)
+
+    def load_checkpoint(self, fn: str, rng: np.random.Generator) -> dict:
+        """Load the state of a run saved by save_checkpoint, restoring the Generator's state.
+
+        Returns:
+            a dict of the "generation" to continue from, the "population", the list of "explored" rows, the "archive" and the "convergence" history.
+        """
+        with np.load(fn) as checkpoint:
+            arrays = dict(checkpoint)
+        rng.bit_generator.state = json.loads(str(arrays["rng_state"]))
+
+        archive = ParetoArchive()
+        rows = arrays["archive"]
+        scores = self.measure(rows)
+        for i, key in enumerate(self.row_keys(rows)):
+            archive.insert(key, scores[self.x][i], scores[self.y][i])
+
+        return {
+            "generation": int(arrays["generation"]),
+            "population": arrays["population"],
+            "explored": [arrays["explored"]],
+            "archive": archive,
+            "convergence": json.loads(str(arrays["convergence"])),
+        }
+
+    def __rows(self, keys: list[bytes], width: int) -> np.ndarray:
+        """The rows of expression indices with the given keys."""
+        rows = [np.frombuffer(key, dtype=np.int64) for key in keys]
+        return np.array(rows, dtype=np.int64).reshape(-1, width)
+
+    ##########################################################################
+    # Fitting
+    ##########################################################################
+
+    def fit(
+        self,
+        seed_population: list[ModalLanguage],
+        id_start: int,
+        explore: float = 0.0,
+        seed: int = None,
+        checkpoint_fn: str = None,
+        checkpoint_every: int = 0,
+        resume: bool = False,
+    ) -> dict:
+        """Run the evolutionary algorithm.
+
+        Args:
+            seed_population: the languages of the first generation
+
+            id_start: the number of languages generated so far, used to name new languages
+
+            explore: the fraction of parents sampled from all explored languages instead of the dominating languages
+
+            seed: the seed of the numpy random Generator. If None, it is drawn from numpy's global random state, so that file_util.set_seed makes runs reproducible.
+
+            checkpoint_fn: the .npz file to save checkpoints to and resume from
+
+            checkpoint_every: the number of generations between checkpoints, or 0 for none. A checkpoint is also saved after the last generation.
+
+            resume: whether to continue from the checkpoint in checkpoint_fn, if it exists, instead of from the seed population
+
+        Returns:
+            a dict of the "dominating_languages" among all explored languages, the distinct "explored_languages" with their objective values in `data`, and the updated "id_start", as altk's optimizer returns, and the number of "generations" run, which is fewer than self.generations if the run converged.
+        """
+        if seed is None:
+            seed = np.random.randint(2**32)
+        rng = np.random.default_rng(seed)
+
+        start = 0
+        P = self.encode(seed_population)
+        explored = []
+        # the frontier of every language explored so far, maintained online
+        archive = ParetoArchive()
+        # the reference point and history of the frontier's hypervolume
+        convergence = {"reference": None, "hypervolumes": []}
+        if resume and checkpoint_fn is not None and os.path.exists(checkpoint_fn):
+            state = self.load_checkpoint(checkpoint_fn, rng)
+            start = state["generation"]
+            P = state["population"]
+            explored = state["explored"]
+            archive = state["archive"]
+            convergence = state["convergence"]
+
+        done = start
+        for generation in range(start, self.generations):
+            scores = self.measure(P)
+            explored.append(P)
+            dominating = self.unique_rows(P, self.dominating(scores))
+            keys = self.row_keys(P[dominating])
+            for key, i in zip(keys, dominating):
+                archive.insert(key, scores[self.x][i], scores[self.y][i])
+
+            done = generation + 1
+            if self.patience:
+                if convergence["reference"] is None:
+                    convergence["reference"] = self.reference_point(scores)
+                convergence["hypervolumes"].append(
+                    archive.hypervolume(convergence["reference"])
+                )
+                if self.converged(convergence["hypervolumes"], self.patience):
+                    break
+
+            # sample parents
+            num_explore = int(explore * len(dominating))
+            parents = P[rng.permutation(dominating)[: len(dominating) - num_explore]]
+            if num_explore:
+                pool = np.concatenate(explored)
+                parents = np.concatenate(
+                    [parents, pool[rng.choice(len(pool), num_explore, replace=False)]]
+                )
+
+            P = self.sample_mutated(parents, rng)
+
+            if checkpoint_fn is not None and checkpoint_every:
+                if done % checkpoint_every == 0 or done == self.generations:
+                    self.save_checkpoint(
+                        checkpoint_fn, done, P, explored, archive, rng, convergence
+                    )
+
+        result = self.results(explored, archive, id_start)
+        result["generations"] = done
+        return result
+
+    ##########################################################################
+    # Convergence
+    ##########################################################################
+
+    def reference_point(self, scores: dict[str, np.ndarray]) -> list[float]:
+        """A reference point for hypervolumes, worse than every point of the first generation on both objectives by a tenth of their range (or 1 if all points are equal)."""
+        reference = []
+        for name in [self.x, self.y]:
+            low, high = float(np.min(scores[name])), float(np.max(scores[name]))
+            reference.append(high + ((high - low) / 10 if high > low else 1.0))
+        return reference
+
+    def converged(self, hypervolumes: list[float], window: int) -> bool:
+        """Whether the hypervolume improved by at most the relative tolerance over the last `window` steps."""
+        if len(hypervolumes) <= window:
+            return False
+        before = hypervolumes[-1 - window]
+        return hypervolumes[-1] - before <= self.tolerance * abs(before)
+
+    def results(
+        self, explored: list[np.ndarray], archive: ParetoArchive, id_start: int
+    ) -> dict:
+        """Convert the distinct explored rows to ModalLanguages, measured and named in order of exploration.
+
+        If on_explored is set, each explored language is passed to it as soon as it is built, and only the dominating languages are kept, so that a long run's languages are never all in memory at once; the rows they are built from are.
+
+        Returns:
+            a dict of the "dominating_languages" in the archive, the distinct "explored_languages", empty if they were passed to on_explored, and the updated "id_start".
+        """
+        explored = (
+            np.concatenate(explored)
+            if explored
+            else np.zeros((0, self.lang_size + 1), dtype=np.int64)
+        )
+        explored = explored[self.unique_rows(explored, np.arange(len(explored)))]
+        scores = self.measure(explored)
+        keys = archive.items()
+        dominating = dict.fromkeys(keys)
+        languages = []
+        for i, (key, row) in enumerate(zip(self.row_keys(explored), explored)):
+            language = self.decode(row)
+            for name in self.objectives:
+                language.data[name] = float(scores[name][i])
+            id_start += 1
+            language.data["name"] = f"sampled_lang_{id_start}"
+            if key in dominating:
+                dominating[key] = language
+            if self.on_explored is None:
+                languages.append(language)
+            else:
+                self.on_explored(language)
+
+        return {
+            "dominating_languages": [dominating[key] for key in keys],
+            "explored_languages": languages,
+            "id_start": id_start,
+        }
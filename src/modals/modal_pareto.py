@@ -0,0 +1,241 @@
+"""Functions for finding the Pareto frontier of a population of languages on two objectives to minimize, e.g. (comm_cost, complexity).
+
+A point dominates another if it is no worse on both objectives and better on at least one. Identical points do not dominate each other, so duplicates of a non-dominated point are all non-dominated and share a rank, as in altk's pareto_optimal_languages.
+
+Rather than checking every pair of points, the points are sorted by x then y and swept once, so that a population of n languages takes O(n log n) time.
+
+    Typical usage example:
+
+    x = np.array([lang.data["comm_cost"] for lang in languages])
+    y = np.array([lang.data["complexity"] for lang in languages])
+    dominating_languages = [languages[i] for i in non_dominated_indices(x, y)]
+"""
+
+import numpy as np
+from bisect import bisect_left, bisect_right
+
+
+def non_dominated_indices(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """The indices of the non-dominated points, in increasing order.
+
+    After sorting by x then y, a point is non-dominated exactly if its y is lower than that of every earlier point with a different position, i.e. than the running minimum of y over the previous distinct points.
+
+    Args:
+        x: the first objective of each point
+
+        y: the second objective of each point
+
+    Returns:
+        the sorted indices into x and y of the non-dominated points.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if not len(x):
+        return np.zeros(0, dtype=np.int64)
+
+    order, first = sort_points(x, y)
+    # the lowest y of the distinct points before each distinct point
+    ys = y[order[first]]
+    best = np.concatenate([[np.inf], np.minimum.accumulate(ys)[:-1]])
+    optimal = ys < best
+
+    # broadcast from each distinct point to its duplicates
+    optimal = np.repeat(optimal, np.diff(np.append(first, len(order))))
+    return np.sort(order[optimal])
+
+
+def non_dominated_ranks(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """The non-dominated rank of every point: 0 for the Pareto frontier, 1 for the frontier of the remaining points, and so on.
+
+    The distinct points are swept in order of x then y, keeping the lowest y of each front so far. These lowest ys increase with rank, so a point belongs to the first front whose lowest y exceeds its y, found by bisection.
+
+    Args:
+        x: the first objective of each point
+
+        y: the second objective of each point
+
+    Returns:
+        an integer array of the rank of each point.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if not len(x):
+        return np.zeros(0, dtype=np.int64)
+
+    order, first = sort_points(x, y)
+    fronts = []  # the lowest y of each front so far
+    distinct_ranks = []
+    for value in y[order[first]].tolist():
+        rank = bisect_right(fronts, value)
+        if rank == len(fronts):
+            fronts.append(value)
+        else:
+            fronts[rank] = value
+        distinct_ranks.append(rank)
+
+    ranks = np.empty(len(x), dtype=np.int64)
+    ranks[order] = np.repeat(distinct_ranks, np.diff(np.append(first, len(order))))
+    return ranks
+
+
+def hypervolume(x: np.ndarray, y: np.ndarray, reference: tuple[float, float]) -> float:
+    """The area dominated by the points and bounded by a reference point that is worse than them on both objectives.
+
+    The non-dominated points sorted by x form a staircase, whose area is summed one step at a time. Points not better than the reference on both objectives add nothing.
+
+    Args:
+        x: the first objective of each point
+
+        y: the second objective of each point
+
+        reference: the (x, y) point bounding the area
+
+    Returns:
+        the hypervolume (area) of the points.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    inside = (x < reference[0]) & (y < reference[1])
+    x, y = x[inside], y[inside]
+    if not len(x):
+        return 0.0
+
+    front = non_dominated_indices(x, y)
+    front = front[np.lexsort((y[front], x[front]))]
+    widths = np.diff(np.append(x[front], reference[0]))
+    return float(np.sum(widths * (reference[1] - y[front])))
+
+
+def sort_points(x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Sort points by x then y.
+
+    Returns:
+        a tuple of the sorting permutation and the positions in sorted order of the first of each run of identical points.
+    """
+    order = np.lexsort((y, x))
+    xs, ys = x[order], y[order]
+    new = np.ones(len(order), dtype=bool)
+    new[1:] = (xs[1:] != xs[:-1]) | (ys[1:] != ys[:-1])
+    return (order, np.flatnonzero(new))
+
+
+##############################################################################
+# Incremental archive
+##############################################################################
+
+
+class ParetoStaircase:
+    """The non-dominated points of two objectives to minimize, kept sorted by x, so that y strictly decreases.
+
+    Each distinct point holds the list of items inserted at it.
+    """
+
+    def __init__(self):
+        self.xs = []
+        self.ys = []
+        self.items = []
+
+    def dominates(self, x: float, y: float, strict: bool = True) -> bool:
+        """Whether some point dominates (x, y), or with strict=False, whether some point is at least as good on both objectives."""
+        k = bisect_right(self.xs, x) - 1
+        if k < 0 or self.ys[k] > y:
+            return False
+        return not strict or (self.xs[k], self.ys[k]) != (x, y)
+
+    def insert(self, item, x: float, y: float) -> bool:
+        """Insert an item at (x, y) unless (x, y) is dominated, removing the points it dominates.
+
+        Returns:
+            whether the item was inserted.
+        """
+        k = bisect_right(self.xs, x) - 1
+        if k >= 0 and self.ys[k] <= y:
+            if (self.xs[k], self.ys[k]) != (x, y):
+                return False
+            self.items[k].append(item)
+            return True
+
+        lo = bisect_left(self.xs, x)
+        self.remove_dominated(x, y, lo=lo)
+        self.xs.insert(lo, x)
+        self.ys.insert(lo, y)
+        self.items.insert(lo, [item])
+        return True
+
+    def remove_dominated(self, x: float, y: float, lo: int = None) -> None:
+        """Remove the points that are no better than (x, y) on both objectives, including (x, y) itself."""
+        if lo is None:
+            lo = bisect_left(self.xs, x)
+        hi = lo
+        while hi < len(self.xs) and self.ys[hi] >= y:
+            hi += 1
+        del self.xs[lo:hi], self.ys[lo:hi], self.items[lo:hi]
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+
+class ParetoArchive:
+    """An archive of the items not dominated on two objectives, (x, y), and an optional third objective z with few distinct values, all to minimize.
+
+    Items are inserted one at a time, so that a frontier can be maintained online. Each distinct value of z has a ParetoStaircase of the (x, y) points at that value, and a point is dominated exactly if a staircase at a lower z has a point at least as good on (x, y), or the staircase at its own z has a point dominating it. Each insertion takes logarithmic time per distinct value of z, plus the removal of the points it dominates.
+
+    A third objective to maximize, e.g. the degree to which a language satisfies a universal, can be negated.
+
+    Example usage:
+
+        archive = ParetoArchive()
+        for lang in languages:
+            archive.insert(lang, lang.data["comm_cost"], lang.data["complexity"])
+        dominating_languages = archive.items()
+    """
+
+    def __init__(self):
+        self.staircases = {}  # z -> ParetoStaircase
+
+    def dominates(self, x: float, y: float, z: float = 0) -> bool:
+        """Whether some point in the archive dominates (x, y, z)."""
+        for level, staircase in self.staircases.items():
+            if level < z and staircase.dominates(x, y, strict=False):
+                return True
+            if level == z and staircase.dominates(x, y):
+                return True
+        return False
+
+    def insert(self, item, x: float, y: float, z: float = 0) -> bool:
+        """Insert an item at (x, y, z) unless it is dominated, removing the items it dominates.
+
+        Returns:
+            whether the item was inserted.
+        """
+        if self.dominates(x, y, z):
+            return False
+        for level in list(self.staircases):
+            if level > z:
+                self.staircases[level].remove_dominated(x, y)
+                if not self.staircases[level]:
+                    del self.staircases[level]
+        self.staircases.setdefault(z, ParetoStaircase()).insert(item, x, y)
+        return True
+
+    def hypervolume(self, reference: tuple[float, float]) -> float:
+        """The hypervolume of the (x, y) points in the archive, ignoring z."""
+        xs = [x for staircase in self.staircases.values() for x in staircase.xs]
+        ys = [y for staircase in self.staircases.values() for y in staircase.ys]
+        return hypervolume(xs, ys, reference)
+
+    def items(self) -> list:
+        """The items on the frontier, ordered by z, then x."""
+        return [
+            item
+            for level in sorted(self.staircases)
+            for items in self.staircases[level].items
+            for item in items
+        ]
+
+    def __len__(self) -> int:
+        return sum(
+            len(items)
+            for staircase in self.staircases.values()
+            for items in staircase.items
+        )
@@ -0,0 +1,37 @@
+"""A program to check that every LoT formula in the expressions file denotes its expression's meaning.
+
+Each formula is compiled to integer bit operations and compared with the bitmask of the recorded meaning, so a whole expressions file is checked in milliseconds.
+"""
+
+import sys
+import time
+from modals.modal_language_of_thought import ModalLOT
+from misc.file_util import load_configs, load_space, load_expressions
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("Usage: python3 src/validate_expressions.py path_to_config_file")
+        raise TypeError(f"Expected {2} arguments but received {len(sys.argv)}.")
+
+    config_fn = sys.argv[1]
+    configs = load_configs(config_fn)
+    space = load_space(configs["file_paths"]["meaning_space"])
+    expressions = load_expressions(configs["file_paths"]["expressions"])
+
+    mlot = ModalLOT(space, configs["language_of_thought"])
+    start = time.perf_counter()
+    invalid = mlot.invalid_descriptions(expressions)
+    seconds = time.perf_counter() - start
+
+    for e in invalid:
+        print(f"{e.form}: {e.lot_expression} does not denote {e.meaning}")
+    print(
+        f"Checked {len(expressions)} expressions in {1000 * seconds:.2f}ms; {len(invalid)} invalid."
+    )
+    if invalid:
+        raise ValueError(f"{len(invalid)} LoT formulas do not denote their meaning.")
+
+
+if __name__ == "__main__":
+    main()
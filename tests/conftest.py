@@ -0,0 +1,86 @@
+"""Shared fixtures: a small modal meaning space and its expressions, as generate_expressions builds them."""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+FORCES = ["weak", "strong"]
+FLAVORS = ["epistemic", "deontic", "circumstantial"]
+LOT_CONFIGS = {"negation": True, "backend": "heuristic"}
+
+
+@pytest.fixture(scope="session")
+def space():
+    pytest.importorskip("altk.language.semantics")
+    from modals.modal_meaning import ModalMeaningSpace
+
+    return ModalMeaningSpace(FORCES, FLAVORS)
+
+
+@pytest.fixture(scope="session")
+def mlot(space):
+    from modals.modal_language_of_thought import ModalLOT
+
+    return ModalLOT(space, LOT_CONFIGS)
+
+
+@pytest.fixture(scope="session")
+def expressions(space, mlot):
+    from modals.modal_language import ModalExpression
+
+    expressions = []
+    for i, meaning in enumerate(space.generate_meanings()):
+        formula = mlot.minimum_lot_description_from_bitmask(meaning.to_bitmask())
+        expressions.append(
+            ModalExpression(
+                form=f"dummy_form_{i}",
+                meaning=meaning,
+                lot_expression=formula,
+                complexity=mlot.formula_complexity(formula),
+                histogram=mlot.formula_histogram(formula),
+            )
+        )
+    return expressions
+
+
+@pytest.fixture
+def objectives():
+    """Cheap stand-ins for comm_cost and complexity: the fraction of points a language leaves uncovered, and the summed complexity of its expressions."""
+
+    def comm_cost(language):
+        covered = 0
+        for e in language.expressions:
+            covered |= e.meaning.to_bitmask()
+        return 1 - bin(covered).count("1") / (len(FORCES) * len(FLAVORS))
+
+    def complexity(language):
+        return float(sum(e.complexity for e in language.expressions))
+
+    return {"comm_cost": comm_cost, "complexity": complexity}
+
+
+@pytest.fixture
+def make_optimizer(objectives, expressions):
+    """A factory of small optimizers over the shared expressions, of VectorizedModalOptimizer or a subclass, with keyword arguments overriding the defaults."""
+
+    def make(cls=None, **kwargs):
+        if cls is None:
+            from modals.modal_optimization import VectorizedModalOptimizer as cls
+
+        params = dict(
+            objectives=objectives,
+            expressions=expressions,
+            sample_size=20,
+            max_mutations=2,
+            generations=6,
+            lang_size=4,
+            item_complexities=np.array(
+                [e.complexity for e in expressions], dtype=float
+            ),
+        )
+        return cls(**{**params, **kwargs})
+
+    return make
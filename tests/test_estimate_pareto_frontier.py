@@ -0,0 +1,102 @@
+import random
+import pytest
+
+
+def save(tmp_path, name, languages):
+    from misc import file_util
+
+    fn = str(tmp_path / name)
+    file_util.save_languages(fn, languages, id_start=0, verbose=False)
+    return fn
+
+
+def language(expressions, indices, name):
+    from modals.modal_language import ModalLanguage
+
+    return ModalLanguage([expressions[i] for i in indices], name=name)
+
+
+def fingerprints(languages):
+    return [lang.fingerprint() for lang in languages]
+
+
+def test_warm_start_keeps_the_distinct_languages_of_earlier_files_first(
+    tmp_path, expressions
+):
+    from estimate_pareto_frontier import warm_start_languages
+    from modals.modal_language import ModalExpression
+
+    # as saved by a previous run, with forms of its own
+    saved = [
+        ModalExpression(f"old_{e.form}", e.meaning, e.lot_expression)
+        for e in expressions
+    ]
+    first = [language(saved, [i, i + 1], f"first_{i}") for i in range(5)]
+    second = [language(saved, [i, i + 2], f"second_{i}") for i in range(5)]
+    # a duplicate within a file, and of the first file in the second
+    fns = [
+        save(tmp_path, "first.yml", first + [first[0]]),
+        save(tmp_path, "second.yml", [first[1]] + second),
+    ]
+
+    random.seed(0)
+    warm = warm_start_languages(fns, expressions, lang_size=4)
+    assert len(warm) == 10
+    assert len(set(fingerprints(warm))) == 10
+    assert sorted(fingerprints(warm[:5])) == sorted(fingerprints(first))
+    assert sorted(fingerprints(warm[5:])) == sorted(fingerprints(second))
+    # rebuilt from this run's expressions
+    by_meaning = {e.meaning.to_bitmask(): e for e in expressions}
+    for lang in warm:
+        for e in lang.expressions:
+            assert e.form == by_meaning[e.meaning.to_bitmask()].form
+
+
+def test_warm_start_skips_missing_files(tmp_path, expressions):
+    from estimate_pareto_frontier import warm_start_languages
+
+    fn = save(tmp_path, "langs.yml", [language(expressions, [0, 1], "lang")])
+    missing = str(tmp_path / "missing.yml")
+    warm = warm_start_languages([missing, fn, missing], expressions, lang_size=4)
+    assert fingerprints(warm) == [language(expressions, [0, 1], "lang").fingerprint()]
+
+
+def test_warm_start_skips_languages_larger_than_lang_size(tmp_path, expressions):
+    from estimate_pareto_frontier import warm_start_languages
+
+    small = language(expressions, [0, 1], "small")
+    large = language(expressions, [0, 1, 2], "large")
+    fn = save(tmp_path, "langs.yml", [small, large])
+    warm = warm_start_languages([fn], expressions, lang_size=2)
+    assert fingerprints(warm) == [small.fingerprint()]
+
+
+def test_warm_start_skips_unknown_meanings(tmp_path, expressions):
+    from estimate_pareto_frontier import warm_start_languages
+
+    known = language(expressions, [0, 1], "known")
+    unknown = language(expressions, [1, 2], "unknown")
+    fn = save(tmp_path, "langs.yml", [known, unknown])
+    # this run has no expression with the meaning of expressions[2]
+    remaining = expressions[:2] + expressions[3:]
+    warm = warm_start_languages([fn], remaining, lang_size=4)
+    assert fingerprints(warm) == [known.fingerprint()]
+
+
+def test_warm_start_skips_languages_of_another_space(tmp_path, expressions):
+    from conftest import FLAVORS, FORCES
+    from estimate_pareto_frontier import warm_start_languages
+    from modals.modal_language import ModalExpression
+    from modals.modal_meaning import ModalMeaningSpace
+
+    other = ModalMeaningSpace(FORCES + ["necessity"], FLAVORS)
+    foreign = [
+        ModalExpression(f"foreign_{i}", meaning, "(1 )")
+        for i, meaning in enumerate(other.generate_meanings()[1:3])
+    ]
+    fns = [
+        save(tmp_path, "other.yml", [language(foreign, [0, 1], "foreign")]),
+        save(tmp_path, "langs.yml", [language(expressions, [0, 1], "lang")]),
+    ]
+    warm = warm_start_languages(fns, expressions, lang_size=4)
+    assert fingerprints(warm) == [language(expressions, [0, 1], "lang").fingerprint()]
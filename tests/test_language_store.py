@@ -0,0 +1,74 @@
+import pytest
+
+
+@pytest.fixture
+def languages(expressions):
+    from modals.modal_language import ModalLanguage
+
+    return [
+        ModalLanguage(expressions[i : i + 3], name=f"lang_{i}")
+        for i in range(0, len(expressions) - 3, 2)
+    ]
+
+
+@pytest.fixture
+def store(tmp_path, space):
+    from misc.language_store import LanguageStore
+
+    store = LanguageStore(str(tmp_path / "explored.jsonl"), space)
+    yield store
+    store.close()
+
+
+def test_fingerprint_ignores_expression_order(languages):
+    from misc.language_store import LanguageStore
+    from modals.modal_language import ModalLanguage
+
+    lang = languages[0]
+    shuffled = ModalLanguage(list(reversed(list(lang.expressions))))
+    assert LanguageStore.fingerprint(shuffled) == LanguageStore.fingerprint(lang)
+    assert LanguageStore.fingerprint(languages[1]) != LanguageStore.fingerprint(lang)
+
+
+def test_add_deduplicates_by_meanings(store, languages):
+    from modals.modal_language import ModalLanguage
+
+    for lang in languages:
+        assert store.add(lang)
+    copy = ModalLanguage(list(languages[0].expressions), name="copy")
+    assert copy in store
+    assert not store.add(copy)
+    assert len(store) == len(languages)
+
+
+def test_languages_read_back_in_order(store, languages):
+    for lang in languages:
+        store.add(lang)
+    store.close()
+    read = list(store)
+    assert [lang.data["name"] for lang in read] == [
+        lang.data["name"] for lang in languages
+    ]
+    assert [lang.fingerprint() for lang in read] == [
+        lang.fingerprint() for lang in languages
+    ]
+
+
+def test_read_positions(store, languages):
+    for lang in languages:
+        store.add(lang)
+    # readable while still open
+    read = store.read([3, 0, 3])
+    assert [lang.data["name"] for lang in read] == ["lang_6", "lang_0", "lang_6"]
+
+
+def test_languages_of_a_closed_store(store, space, languages):
+    from misc.language_store import LanguageStore
+
+    for lang in languages:
+        store.add(lang)
+    store.close()
+    read = list(LanguageStore.languages(store.fn, space))
+    assert [lang.data["name"] for lang in read] == [
+        lang.data["name"] for lang in languages
+    ]
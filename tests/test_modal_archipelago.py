@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+pg = pytest.importorskip("pygmo")
+
+
+@pytest.fixture
+def optimizer(make_optimizer):
+    from modals.modal_archipelago import ArchipelagoModalOptimizer
+
+    return make_optimizer(
+        ArchipelagoModalOptimizer,
+        sample_size=32,
+        generations=5,
+        islands=2,
+        migration_every=2,
+    )
+
+
+def test_problem_records_every_evaluation(optimizer):
+    from modals.modal_archipelago import ModalLanguageProblem
+
+    problem = ModalLanguageProblem(optimizer)
+    dvs = np.array([[1, 2, 0, 0], [3, 3, 1, 0]])
+    problem.batch_fitness(dvs.ravel())
+    problem.fitness(np.array([2, 0, 0, 0]))
+    rows = np.concatenate([P for P, _ in problem.evaluated])
+    assert rows.tolist() == [
+        [1, 0, -1, -1, -1],
+        [2, 0, -1, -1, -1],
+        [1, -1, -1, -1, -1],
+    ]
+
+
+def test_generations_are_capped(optimizer, expressions):
+    from modals.modal_language import ModalLanguage
+
+    seeds = [ModalLanguage([e]) for e in expressions[:8]]
+    result = optimizer.fit(seeds, id_start=0, explore=0.25, seed=0)
+    assert result["generations"] == 5
+    assert len(result["explored_languages"]) >= len(result["dominating_languages"])
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def optimizer(make_optimizer):
+    from modals.modal_coverage import CoverageModalOptimizer
+
+    return make_optimizer(
+        CoverageModalOptimizer,
+        generations=10,
+        bounds=[(0.0, 1.0), (0.0, 40.0)],
+        bins=5,
+        per_cell=2,
+        target=0.3,
+    )
+
+
+def test_coverage_grows_when_reaching_new_cells(optimizer):
+    counts = np.zeros((5, 5), dtype=np.int64)
+    counts[0, 0] = 2
+    before = optimizer.coverage(counts)
+    counts[3, 3] = 1
+    assert optimizer.coverage(counts) > before
+
+
+def test_coverage_is_of_the_whole_grid(optimizer):
+    counts = np.zeros((5, 5), dtype=np.int64)
+    counts[0, :] = 10
+    assert optimizer.coverage(counts) == pytest.approx(5 / 25)
+
+
+def test_full_first_cells_do_not_stop_the_run(optimizer, expressions):
+    from modals.modal_language import ModalLanguage
+
+    # distinct single-expression languages of one point each, filling few cells
+    singletons = [e for e in expressions if bin(e.meaning.to_bitmask()).count("1") == 1]
+    seeds = [ModalLanguage([e]) for e in singletons]
+    result = optimizer.fit(seeds, id_start=0, seed=0)
+    assert result["generations"] > 1
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+
+def counts(language):
+    return (
+        language.coverage,
+        +language.point_counts,
+        language.num_ambiguous,
+        +language.meaning_ids,
+    )
+
+
+def recounted(language):
+    """The counts of a language rebuilt from its expressions, which recounts them from scratch."""
+    from modals.modal_language import ModalLanguage
+
+    return counts(ModalLanguage(list(language.expressions)))
+
+
+@pytest.mark.parametrize("synonyms", [False, True])
+def test_incremental_counts_match_a_recount(expressions, synonyms):
+    from modals.modal_language import ModalLanguage
+
+    random.seed(0)
+    # with synonyms, draw from a few expressions so that they repeat
+    vocabulary = expressions[:4] if synonyms else expressions
+    for _ in range(100):
+        language = ModalLanguage(random.sample(vocabulary, 2))
+        for _ in range(6):
+            action = random.choice(["add", "pop", "remove"])
+            if action == "add":
+                if not synonyms and len(language.expressions) == len(vocabulary):
+                    continue
+                candidates = [
+                    e
+                    for e in vocabulary
+                    if synonyms or e.meaning.to_bitmask() not in language.meaning_ids
+                ]
+                language.add_expression(random.choice(candidates))
+            elif len(language.expressions) > 1:
+                if action == "pop":
+                    language.pop(random.randrange(len(language.expressions)))
+                else:
+                    language.remove_expression(random.choice(language.expressions))
+            assert counts(language) == recounted(language)
+
+
+def test_adding_a_synonym_renames_it(expressions):
+    from modals.modal_language import ModalLanguage
+
+    language = ModalLanguage([expressions[0]])
+    language.add_expression(expressions[0])
+    forms = [e.form for e in language.expressions]
+    assert len(set(forms)) == 2
+    assert language.meaning_ids[expressions[0].meaning.to_bitmask()] == 2
+
+
+def test_cannot_pop_the_last_expression(expressions):
+    from modals.modal_language import ModalLanguage
+
+    with pytest.raises(ValueError):
+        ModalLanguage([expressions[0]]).pop(0)
@@ -0,0 +1,179 @@
+import pytest
+
+from conftest import FLAVORS, FORCES, LOT_CONFIGS
+
+
+def make_lot(space, instrument=False, **lot_configs):
+    from modals.modal_language_of_thought import ModalLOT
+
+    return ModalLOT(space, {**LOT_CONFIGS, **lot_configs}, instrument=instrument)
+
+
+def mask_of(mlot, *atoms):
+    """The bitmask of the conjunction of some atoms."""
+    mask = mlot.atom_masks[mlot.atoms.index("1")]
+    for atom in atoms:
+        mask &= mlot.atom_masks[mlot.atoms.index(atom)]
+    return mask
+
+
+def test_bitmask_round_trips(space):
+    for mask in range(1 << (len(FORCES) * len(FLAVORS))):
+        assert space.array_to_bitmask(space.bitmask_to_array(mask)) == mask
+
+
+def test_meaning_bitmasks_match_their_arrays(space):
+    for meaning in space.generate_meanings():
+        assert space.array_to_bitmask(meaning.to_array()) == meaning.to_bitmask()
+
+
+@pytest.mark.parametrize(
+    "formula, atoms",
+    [
+        ("(weak )", ["weak"]),
+        ("(* (weak ) (epistemic ))", ["weak", "epistemic"]),
+        ("(* (strong ) (* (deontic ) (1 )))", ["strong", "deontic"]),
+    ],
+)
+def test_compile_conjunctions(mlot, formula, atoms):
+    assert mlot.compile_formula(formula)(mlot.atom_masks) == mask_of(mlot, *atoms)
+
+
+def test_compile_disjunction_and_negation(mlot):
+    full = mask_of(mlot)
+    strong = mask_of(mlot, "strong")
+    deontic = mask_of(mlot, "deontic")
+    assert mlot.formula_to_bitmask("(- (strong ))") == full ^ strong
+    assert mlot.formula_to_bitmask("(+ (strong ) (deontic ) (0 ))") == strong | deontic
+    assert mlot.formula_to_bitmask("(- (+ (strong ) (deontic )))") == full ^ (
+        strong | deontic
+    )
+
+
+@pytest.mark.parametrize(
+    "formula",
+    [
+        "(* (weak ) (epistemic )",
+        "(weak ) (strong )",
+        "(maybe )",
+        "(- (weak ) (strong ))",
+    ],
+)
+def test_compile_rejects_invalid_formulas(mlot, formula):
+    with pytest.raises(ValueError):
+        mlot.compile_formula(formula)
+
+
+def test_descriptions_denote_their_meanings(space, mlot):
+    for meaning in space.generate_meanings():
+        mask = meaning.to_bitmask()
+        formula = mlot.minimum_lot_description_from_bitmask(mask)
+        assert mlot.formula_to_bitmask(formula) == mask
+
+
+def test_portfolio_never_loses_to_the_heuristic(space, mlot):
+    portfolio = make_lot(
+        space,
+        backend="portfolio",
+        portfolio={"backends": ["two_level", "egraph"], "budget": 5.0},
+    )
+    for meaning in space.generate_meanings():
+        mask = meaning.to_bitmask()
+        formula = portfolio.minimum_lot_description_from_bitmask(mask)
+        assert portfolio.formula_to_bitmask(formula) == mask
+        heuristic = mlot.minimum_lot_description_from_bitmask(mask)
+        assert portfolio.formula_complexity(formula) <= mlot.formula_complexity(
+            heuristic
+        )
+
+
+def test_portfolio_without_budget_returns_the_dnf(space):
+    portfolio = make_lot(
+        space,
+        instrument=True,
+        backend="portfolio",
+        portfolio={"backends": ["two_level", "heuristic"], "budget": 0.0},
+    )
+    for meaning in space.generate_meanings():
+        mask = meaning.to_bitmask()
+        formula = portfolio.minimum_lot_description_from_bitmask(mask)
+        assert portfolio.formula_to_bitmask(formula) == mask
+        assert portfolio.stats["portfolio_winner"] == "dnf"
+        assert portfolio.stats["portfolio_backends_run"] == 0
+
+
+def test_portfolio_runs_fast_backends_before_the_heuristic(space):
+    from modals.modal_meaning import ModalMeaningSpace
+
+    # a meaning of a larger space on which the heuristic searches for seconds
+    large = ModalMeaningSpace(["f0", "f1", "f2", "f3"], ["v0", "v1", "v2", "v3", "v4"])
+    mask = 66172
+    two_level = make_lot(large, backend="two_level")
+    expected = two_level.formula_complexity(
+        two_level.minimum_lot_description_from_bitmask(mask)
+    )
+    portfolio = make_lot(
+        large,
+        instrument=True,
+        backend="portfolio",
+        portfolio={"backends": ["two_level", "heuristic"], "budget": 0.5},
+    )
+    formula = portfolio.minimum_lot_description_from_bitmask(mask)
+    assert portfolio.formula_to_bitmask(formula) == mask
+    assert portfolio.formula_complexity(formula) == expected
+    assert portfolio.stats["portfolio_winner"] == "two_level"
+
+
+def test_heuristic_counts_expansions_and_duplicates(space):
+    lot = make_lot(space, instrument=True)
+    lot.minimum_lot_description_from_bitmask(0b101011)
+    stats = lot.stats
+    assert stats["nodes_expanded"] > 1
+    assert stats["duplicate_children"] > 0
+
+
+@pytest.fixture(scope="module")
+def minimum_complexities(mlot):
+    """The exact minimum complexity of a description of every meaning bitmask, by closing the atoms under +, * and - until no bitmask gets cheaper."""
+    full = mask_of(mlot)
+    cost = {}
+    for atom, mask in zip(mlot.atoms, mlot.atom_masks):
+        cost[mask] = min(cost.get(mask, float("inf")), 1 if atom in ["0", "1"] else 2)
+    changed = True
+    while changed:
+        changed = False
+        for a, cost_a in list(cost.items()):
+            candidates = [(full ^ a, cost_a)]
+            for b, cost_b in list(cost.items()):
+                candidates += [(a | b, cost_a + cost_b), (a & b, cost_a + cost_b)]
+            for mask, c in candidates:
+                if c < cost.get(mask, float("inf")):
+                    cost[mask] = c
+                    changed = True
+    return cost
+
+
+def test_complexity_lower_bound_is_admissible(space, mlot, minimum_complexities):
+    for meaning in space.generate_meanings():
+        mask = meaning.to_bitmask()
+        lower_bound = mlot.complexity_lower_bound(space.bitmask_to_array(mask))
+        assert lower_bound <= minimum_complexities[mask]
+
+
+def test_complexity_lower_bound_is_tight_for_atoms(space, mlot):
+    for atom in FORCES + FLAVORS:
+        arr = space.bitmask_to_array(mask_of(mlot, atom))
+        assert mlot.complexity_lower_bound(arr) == 2
+
+
+@pytest.mark.parametrize("backend", ["two_level", "egraph"])
+def test_backend_matches_the_heuristic(space, mlot, minimum_complexities, backend):
+    lot = make_lot(space, backend=backend)
+    for meaning in space.generate_meanings():
+        mask = meaning.to_bitmask()
+        formula = lot.minimum_lot_description_from_bitmask(mask)
+        assert lot.formula_to_bitmask(formula) == mask
+        heuristic = mlot.minimum_lot_description_from_bitmask(mask)
+        # both find the exact minimum on this small space
+        assert lot.formula_complexity(formula) == mlot.formula_complexity(heuristic)
+        assert lot.formula_complexity(formula) == minimum_complexities[mask]
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+# small walkers: 4 of 4 neighbours each
+PARAMS = dict(sample_size=16, max_mutations=1, neighbours=4, tabu_size=3)
+
+
+def names(result, key):
+    return sorted(lang.data["name"] for lang in result[key])
+
+
+@pytest.mark.parametrize("method", ["hill_climbing", "annealing", "tabu"])
+def test_refitting_repeats_the_run(make_optimizer, expressions, method):
+    from modals.modal_language import ModalLanguage
+    from modals.modal_local_search import LocalSearchModalOptimizer
+
+    optimizer = make_optimizer(LocalSearchModalOptimizer, method=method, **PARAMS)
+    seeds = [ModalLanguage([e]) for e in expressions[:8]]
+    first = optimizer.fit(seeds, id_start=0, seed=1)
+    second = optimizer.fit(seeds, id_start=0, seed=1)
+    assert first["generations"] == second["generations"] == 6
+    for key in ["explored_languages", "dominating_languages"]:
+        assert names(first, key) == names(second, key)
+
+
+def test_unknown_method(make_optimizer):
+    from modals.modal_local_search import LocalSearchModalOptimizer
+
+    with pytest.raises(ValueError):
+        make_optimizer(LocalSearchModalOptimizer, method="gradient_descent", **PARAMS)
+
+
+def recording(optimizer):
+    """Record each call of the optimizer's strategy: the neighbours' and the walkers' scalarisations, the walkers' recently visited languages and the neighbours' keys, all as they were before the call, and the choice."""
+    calls = []
+    strategy = optimizer.methods[optimizer.method]
+
+    def record(values, current, N, step, visited, rng):
+        before = (values.copy(), current.copy(), [set(recent) for recent in visited])
+        choice = strategy(values, current, N, step, visited, rng)
+        keys = np.array(optimizer.row_keys(N), dtype=object).reshape(values.shape)
+        calls.append((*before, keys, choice.copy()))
+        return choice
+
+    optimizer.methods[optimizer.method] = record
+    return calls
+
+
+def walk(make_optimizer, expressions, method, **kwargs):
+    from modals.modal_language import ModalLanguage
+    from modals.modal_local_search import LocalSearchModalOptimizer
+
+    params = {**PARAMS, "generations": 20, **kwargs}
+    optimizer = make_optimizer(LocalSearchModalOptimizer, method=method, **params)
+    calls = recording(optimizer)
+    seeds = [ModalLanguage([e]) for e in expressions[:8]]
+    optimizer.fit(seeds, id_start=0, seed=3)
+    return calls
+
+
+def moves(calls):
+    """The (neighbour's, walker's) scalarisations of every move made."""
+    return [
+        (values[w, choice[w]], current[w])
+        for values, current, _, _, choice in calls
+        for w in np.flatnonzero(choice >= 0)
+    ]
+
+
+def test_hill_climbing_never_accepts_a_worse_language(make_optimizer, expressions):
+    calls = walk(make_optimizer, expressions, "hill_climbing")
+    assert moves(calls)
+    assert all(value < current for value, current in moves(calls))
+    # walkers only stay put when no neighbour improves
+    for values, current, _, _, choice in calls:
+        for w in np.flatnonzero(choice < 0):
+            assert values[w].min() >= current[w]
+
+
+def test_annealing_accepts_worse_languages_when_hot(make_optimizer, expressions):
+    hot = walk(make_optimizer, expressions, "annealing", temperature=100.0)
+    assert any(value > current for value, current in moves(hot))
+    cold = walk(make_optimizer, expressions, "annealing", temperature=1e-12)
+    assert all(value <= current for value, current in moves(cold))
+
+
+def test_tabu_never_returns_to_a_recent_language(make_optimizer, expressions):
+    calls = walk(make_optimizer, expressions, "tabu")
+    assert moves(calls)
+    blocked = 0
+    for _, _, visited, keys, choice in calls:
+        for w, recent in enumerate(visited):
+            blocked += sum(key in recent for key in keys[w])
+            if choice[w] >= 0:
+                assert keys[w, choice[w]] not in recent
+    # the recent languages were among the neighbours, so the test is not vacuous
+    assert blocked
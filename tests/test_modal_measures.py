@@ -0,0 +1,191 @@
+import random
+import numpy as np
+import pytest
+
+WEIGHTINGS = [
+    {"identity": 1, "force": 1, "flavor": 1},
+    {"identity": 0.5, "force": 3, "flavor": 1, "+": 1, "*": 1, "-": 2},
+    {"-": 1},
+]
+
+
+@pytest.fixture
+def languages(expressions):
+    from modals.modal_language import ModalLanguage
+
+    rng = random.Random(0)
+    return [
+        ModalLanguage(rng.sample(expressions, rng.randint(1, 5)), name=f"lang_{i}")
+        for i in range(20)
+    ]
+
+
+def test_default_weights_reproduce_expression_complexity(expressions, mlot):
+    from modals.modal_language_of_thought import ExpressionTree
+    from modals.modal_measures import (
+        DEFAULT_COMPLEXITY_WEIGHTS,
+        complexity_weights_vector,
+        item_histogram,
+    )
+
+    weights = complexity_weights_vector(DEFAULT_COMPLEXITY_WEIGHTS)
+    for e in expressions:
+        expected = mlot.expression_complexity(
+            ExpressionTree.from_string(e.lot_expression)
+        )
+        assert item_histogram(e, mlot) @ weights == expected
+
+
+def test_item_histogram_without_a_stored_histogram(expressions, mlot):
+    from modals.modal_language import ModalExpression
+    from modals.modal_measures import item_histogram
+
+    for e in expressions:
+        bare = ModalExpression(e.form, e.meaning, e.lot_expression)
+        assert item_histogram(bare, mlot) == item_histogram(e, mlot)
+
+
+def test_item_complexities_with_default_weights(expressions, mlot):
+    from modals.modal_measures import DEFAULT_COMPLEXITY_WEIGHTS, item_complexities
+
+    assert (
+        item_complexities(expressions, mlot, DEFAULT_COMPLEXITY_WEIGHTS).tolist()
+        == item_complexities(expressions, mlot).tolist()
+    )
+
+
+@pytest.mark.parametrize("weights", WEIGHTINGS)
+def test_language_histograms_give_language_complexity(languages, mlot, weights):
+    from modals.modal_measures import (
+        complexity_weights_vector,
+        language_complexity,
+        language_histograms,
+    )
+
+    complexities = language_histograms(languages, mlot) @ complexity_weights_vector(
+        weights
+    )
+    assert complexities.tolist() == pytest.approx(
+        [language_complexity(lang, mlot, weights=weights) for lang in languages]
+    )
+
+
+def test_linear_complexities(languages, mlot):
+    from modals.modal_measures import (
+        DEFAULT_COMPLEXITY_WEIGHTS,
+        language_complexity,
+        linear_complexities,
+    )
+
+    weightings = [DEFAULT_COMPLEXITY_WEIGHTS, *WEIGHTINGS]
+    complexities = linear_complexities(languages, mlot, weightings)
+    assert complexities.shape == (len(languages), len(weightings))
+    # the default weights measure as the LoT does
+    assert complexities[:, 0].tolist() == [
+        language_complexity(lang, mlot) for lang in languages
+    ]
+    for j, weights in enumerate(weightings):
+        assert complexities[:, j].tolist() == pytest.approx(
+            [language_complexity(lang, mlot, weights=weights) for lang in languages]
+        )
+
+
+def test_histograms_round_trip_through_expressions_file(expressions, mlot, tmp_path):
+    from misc import file_util
+    from modals.modal_measures import item_complexities, item_histogram
+
+    fn = str(tmp_path / "expressions.yml")
+    file_util.save_expressions(fn, expressions)
+    loaded = file_util.load_expressions(fn)
+    assert [e.histogram for e in loaded] == [e.histogram for e in expressions]
+    assert [item_histogram(e, mlot) for e in loaded] == [
+        item_histogram(e, mlot) for e in expressions
+    ]
+    weights = WEIGHTINGS[1]
+    assert np.array_equal(
+        item_complexities(loaded, mlot, weights),
+        item_complexities(expressions, mlot, weights),
+    )
+
+
+def counting(value):
+    """A compute function returning value, counting its calls."""
+
+    def compute():
+        compute.calls += 1
+        return value
+
+    compute.calls = 0
+    return compute
+
+
+def test_memo_counts_hits_and_misses(space):
+    from modals.modal_measures import LanguageMeasureMemo
+
+    memo = LanguageMeasureMemo({}, maxsize=10)
+    compute = counting(0.5)
+    assert memo.get("informativity", (1, 2), compute) == 0.5
+    assert memo.get("informativity", (1, 2), compute) == 0.5
+    assert memo.get("complexity", (1, 2), counting(3)) == 3
+    assert compute.calls == 1
+    assert (memo.hits, memo.misses) == (1, 2)
+    assert len(memo.memo) == 1
+
+
+def test_memo_evicts_the_least_recently_used(space):
+    from modals.modal_measures import LanguageMeasureMemo
+
+    memo = LanguageMeasureMemo({}, maxsize=2)
+    memo.get("complexity", (1,), counting(1))
+    memo.get("complexity", (2,), counting(2))
+    # a hit moves (1,) to the end, so (2,) is evicted by (3,)
+    memo.get("complexity", (1,), counting(1))
+    memo.get("complexity", (3,), counting(3))
+    assert list(memo.memo) == [(1,), (3,)]
+
+    compute = counting(2)
+    assert memo.get("complexity", (2,), compute) == 2
+    assert compute.calls == 1
+    assert list(memo.memo) == [(3,), (2,)]
+    assert (memo.hits, memo.misses) == (1, 4)
+
+
+def test_memo_nested_measures_share_an_entry(expressions):
+    from modals.modal_language import ModalLanguage
+    from modals.modal_measures import LanguageMeasureMemo
+
+    calls = []
+
+    def informativity(language):
+        calls.append(len(language))
+        return 0.25
+
+    memo = LanguageMeasureMemo({"informativity": informativity}, maxsize=2)
+    # comm_cost computes informativity under the same fingerprint, as in estimate_pareto_frontier
+    comm_cost = lambda lang: memo.get(
+        "comm_cost", lang.fingerprint(), lambda: 1 - memo("informativity", lang)
+    )
+    languages = [ModalLanguage(expressions[i : i + 2]) for i in range(3)]
+
+    assert comm_cost(languages[0]) == 0.75
+    assert (memo.hits, memo.misses) == (0, 2)
+    assert list(memo.memo) == [languages[0].fingerprint()]
+    assert memo.memo[languages[0].fingerprint()] == {
+        "informativity": 0.25,
+        "comm_cost": 0.75,
+    }
+
+    assert comm_cost(languages[0]) == 0.75
+    assert memo("informativity", languages[0]) == 0.25
+    assert (memo.hits, memo.misses) == (2, 2)
+    assert len(calls) == 1
+
+    # one entry per language, so two more languages evict the first
+    for lang in languages[1:]:
+        comm_cost(lang)
+    assert list(memo.memo) == [lang.fingerprint() for lang in languages[1:]]
+    assert (memo.hits, memo.misses) == (2, 6)
+    comm_cost(languages[0])
+    assert (memo.hits, memo.misses) == (2, 8)
+    assert len(calls) == 4
+    assert list(memo.memo) == [languages[2].fingerprint(), languages[0].fingerprint()]
@@ -0,0 +1,109 @@
+import random
+
+import pytest
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def masks(language):
+    return sorted(e.meaning.to_bitmask() for e in language.expressions)
+
+
+@pytest.fixture
+def ambiguous(expressions):
+    """Expressions of more than one point."""
+    return [e for e in expressions if popcount(e.meaning.to_bitmask()) > 1]
+
+
+def test_add_modal_adds_a_missing_meaning(expressions):
+    from modals.modal_language import ModalLanguage
+    from modals.modal_mutations import Add_Modal
+
+    random.seed(0)
+    mutation = Add_Modal()
+    added = set()
+    for _ in range(1000):
+        language = ModalLanguage(expressions[:3])
+        before = set(masks(language))
+        mutation.mutate(language, expressions)
+        (new,) = set(masks(language)) - before
+        added.add(new)
+    # every missing meaning can be drawn
+    assert added == {e.meaning.to_bitmask() for e in expressions[3:]}
+
+
+def test_add_point_prefers_uncovered_points(space, expressions):
+    from modals.modal_language import ModalLanguage
+    from modals.modal_mutations import Add_Point
+
+    random.seed(0)
+    full = (1 << len(space.referents)) - 1
+    # covers every point but one
+    language = ModalLanguage(
+        [e for e in expressions if e.meaning.to_bitmask() == full & ~1]
+    )
+    Add_Point().mutate(language, expressions)
+    assert 1 in masks(language)
+
+
+def test_remove_point_drops_one_point(expressions, ambiguous):
+    from modals.modal_language import ModalLanguage
+    from modals.modal_mutations import Remove_Point
+
+    random.seed(0)
+    mutation = Remove_Point()
+    for e in ambiguous[:20]:
+        language = ModalLanguage([e])
+        mutation.mutate(language, expressions)
+        (new,) = masks(language)
+        old = e.meaning.to_bitmask()
+        assert new & ~old == 0
+        assert popcount(new) == popcount(old) - 1
+
+
+def test_remove_point_without_the_target_meaning(expressions, ambiguous):
+    from modals.modal_language import ModalExpressionIndex, ModalLanguage
+    from modals.modal_mutations import Remove_Point
+
+    two_points = [e for e in ambiguous if popcount(e.meaning.to_bitmask()) == 2]
+    index = ModalExpressionIndex(two_points)
+    with pytest.raises(ValueError):
+        Remove_Point(index).mutate(ModalLanguage(two_points[:1]), two_points)
+
+
+def test_index_looks_up_meanings(expressions):
+    from modals.modal_language import ModalExpressionIndex
+
+    index = ModalExpressionIndex(expressions)
+    assert len(index) == len(expressions)
+    for i, e in enumerate(expressions):
+        assert e.meaning.to_bitmask() in index
+        assert index.get(e.meaning.to_bitmask()) is e
+        assert index.positions[e.meaning.to_bitmask()] == [i]
+    assert index.get(0) is None
+
+
+def test_remove_point_with_synonyms(expressions, ambiguous):
+    from modals.modal_language import ModalLanguage
+    from modals.modal_mutations import Remove_Point
+
+    random.seed(0)
+    mutation = Remove_Point()
+    for e in ambiguous:
+        old = e.meaning.to_bitmask()
+        if popcount(old) != 2:
+            continue
+        # the language already has both of its points, so the new expression is a synonym
+        smaller = [
+            f
+            for f in expressions
+            if f.meaning.to_bitmask() & ~old == 0
+            and popcount(f.meaning.to_bitmask()) == popcount(old) - 1
+        ]
+        # with a synonym of the ambiguous expression too, which adding a synonym renames again
+        language = ModalLanguage([e, e] + smaller)
+        mutation.mutate(language, expressions)
+        assert language.meaning_ids[old] == 1
+        assert len(language.expressions) == len(smaller) + 2
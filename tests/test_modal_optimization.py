@@ -0,0 +1,214 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def optimizer(make_optimizer):
+    return make_optimizer()
+
+
+@pytest.fixture
+def population(optimizer, expressions):
+    from modals.modal_language import ModalLanguage
+
+    rng = np.random.default_rng(0)
+    languages = [
+        ModalLanguage([expressions[i] for i in rng.choice(len(expressions), size)])
+        for size in rng.integers(1, 5, 50)
+    ]
+    return optimizer.encode(languages)
+
+
+def only(mutation, rows):
+    """Weights choosing the mutation named whenever it applies."""
+    from modals.modal_optimization import MUTATIONS
+
+    weights = np.full((rows, len(MUTATIONS)), 1e-9)
+    weights[:, MUTATIONS.index(mutation)] = 1.0
+    return weights
+
+
+def row_masks(optimizer, P):
+    return [sorted(optimizer.masks[row[row >= 0]].tolist()) for row in P]
+
+
+def test_encode_decode_round_trip(optimizer, population):
+    for row in population:
+        (encoded,) = optimizer.encode([optimizer.decode(row)])
+        assert encoded.tolist() == row.tolist()
+
+
+def test_mutations_keep_rows_valid(optimizer, population):
+    rng = np.random.default_rng(1)
+    P = population.copy()
+    for _ in range(20):
+        optimizer.mutate(P, rng.integers(1, 4, len(P)), rng)
+        sizes = (P >= 0).sum(axis=1)
+        assert np.all((sizes >= 1) & (sizes <= optimizer.lang_size))
+        # left-aligned, with the spare column empty
+        assert np.all(P[np.arange(len(P)), sizes - 1] >= 0)
+        assert np.all(P[:, optimizer.lang_size] == -1)
+        assert np.all((P[:, :-1] >= 0) | (P[:, 1:] < 0))
+
+
+def test_add_modal_adds_a_missing_expression(optimizer, population):
+    rng = np.random.default_rng(2)
+    P = population[(population >= 0).sum(axis=1) < optimizer.lang_size].copy()
+    before = P.copy()
+    optimizer.mutate(P, np.ones(len(P), dtype=np.int64), rng, only("Add_Modal", len(P)))
+    for old, new in zip(before, P):
+        added = set(new[new >= 0]) - set(old[old >= 0])
+        assert len(added) == 1 and (new >= 0).sum() == (old >= 0).sum() + 1
+
+
+def test_add_point_adds_an_uncovered_point(optimizer, population):
+    rng = np.random.default_rng(3)
+    P = population[(population >= 0).sum(axis=1) < optimizer.lang_size].copy()
+    coverage = [np.bitwise_or.reduce(masks) for masks in row_masks(optimizer, P)]
+    optimizer.mutate(P, np.ones(len(P), dtype=np.int64), rng, only("Add_Point", len(P)))
+    # appended after the language's expressions
+    added = optimizer.masks[P[np.arange(len(P)), (P >= 0).sum(axis=1) - 1]]
+    for point, covered in zip(added, coverage):
+        assert bin(point).count("1") == 1
+        assert covered == optimizer.full or not point & covered
+
+
+def test_remove_point_drops_one_point(optimizer, population):
+    rng = np.random.default_rng(4)
+    P = population.copy()
+    ambiguous = optimizer.preconditions(P)[:, 3]
+    P = P[ambiguous]
+    before = P.copy()
+    optimizer.mutate(
+        P, np.ones(len(P), dtype=np.int64), rng, only("Remove_Point", len(P))
+    )
+    for old, new in zip(before, P):
+        (changed,) = np.flatnonzero(old != new)
+        old_mask, new_mask = (
+            optimizer.masks[old[changed]],
+            optimizer.masks[new[changed]],
+        )
+        assert new_mask & ~old_mask == 0
+        assert bin(old_mask).count("1") == bin(new_mask).count("1") + 1
+
+
+def names(result, key):
+    return [lang.data["name"] for lang in result[key]]
+
+
+def test_resuming_matches_the_uninterrupted_run(make_optimizer, expressions, tmp_path):
+    from modals.modal_language import ModalLanguage
+
+    seeds = [ModalLanguage([e]) for e in expressions[:10]]
+    checkpoint_fn = str(tmp_path / "run.npz")
+    full = make_optimizer().fit(seeds, id_start=0, seed=5)
+
+    # stop after 2 generations, as if interrupted, then resume for the rest
+    make_optimizer(generations=2).fit(
+        seeds, id_start=0, seed=5, checkpoint_fn=checkpoint_fn, checkpoint_every=2
+    )
+    resumed = make_optimizer().fit(
+        seeds, id_start=0, seed=5, checkpoint_fn=checkpoint_fn, resume=True
+    )
+    assert resumed["generations"] == full["generations"] == 6
+    for key in ["explored_languages", "dominating_languages"]:
+        assert names(resumed, key) == names(full, key)
+
+
+def test_resume_without_a_checkpoint_starts_afresh(
+    make_optimizer, expressions, tmp_path
+):
+    from modals.modal_language import ModalLanguage
+
+    seeds = [ModalLanguage([e]) for e in expressions[:10]]
+    fresh = make_optimizer().fit(seeds, id_start=0, seed=5)
+    resumed = make_optimizer().fit(
+        seeds,
+        id_start=0,
+        seed=5,
+        checkpoint_fn=str(tmp_path / "missing.npz"),
+        resume=True,
+    )
+    assert names(resumed, "explored_languages") == names(fresh, "explored_languages")
+
+
+def test_on_explored_streams_the_explored_languages(make_optimizer, expressions):
+    from modals.modal_language import ModalLanguage
+
+    seeds = [ModalLanguage([e]) for e in expressions[:10]]
+    returned = make_optimizer().fit(seeds, id_start=0, seed=5)
+
+    optimizer = make_optimizer()
+    streamed = []
+    optimizer.on_explored = streamed.append
+    # not pickled, e.g. with the optimizer to pygmo's islands
+    assert optimizer.__getstate__()["on_explored"] is None
+    result = optimizer.fit(seeds, id_start=0, seed=5)
+    assert result["explored_languages"] == []
+    assert [lang.data for lang in streamed] == [
+        lang.data for lang in returned["explored_languages"]
+    ]
+    assert names(result, "dominating_languages") == names(
+        returned, "dominating_languages"
+    )
+
+
+def test_converged_after_a_plateau(optimizer):
+    assert not optimizer.converged([1.0, 1.0], 2)
+    assert optimizer.converged([1.0, 1.0, 1.0], 2)
+    assert not optimizer.converged([1.0, 1.0, 1.5], 2)
+    # only the last window counts
+    assert optimizer.converged([0.5, 1.0, 1.5, 1.5, 1.5], 2)
+
+    optimizer.tolerance = 0.1
+    assert optimizer.converged([1.0, 1.05, 1.08], 2)
+    assert not optimizer.converged([1.0, 1.05, 1.12], 2)
+
+
+def test_reference_point(optimizer):
+    scores = {
+        "comm_cost": np.array([0.2, 0.6, 0.4]),
+        "complexity": np.array([3.0, 3.0, 3.0]),
+    }
+    assert optimizer.reference_point(scores) == pytest.approx([0.64, 4.0])
+
+
+def tracking_convergence(optimizer):
+    """Record the hypervolume history at each check of the optimizer for convergence, and the verdict."""
+    checks = []
+    converged = optimizer.converged
+
+    def track(hypervolumes, window):
+        checks.append((list(hypervolumes), converged(hypervolumes, window)))
+        return checks[-1][1]
+
+    optimizer.converged = track
+    return checks
+
+
+def test_fit_stops_once_the_hypervolume_plateaus(make_optimizer, expressions):
+    from modals.modal_language import ModalLanguage
+
+    seeds = [ModalLanguage([e]) for e in expressions[:10]]
+    optimizer = make_optimizer(generations=50, patience=3)
+    checks = tracking_convergence(optimizer)
+    result = optimizer.fit(seeds, id_start=0, seed=5)
+
+    # one check per generation, stopping at the first that converged
+    assert result["generations"] == len(checks) < 50
+    assert [verdict for _, verdict in checks] == [False] * (len(checks) - 1) + [True]
+    hypervolumes, _ = checks[-1]
+    assert len(hypervolumes) == result["generations"]
+    assert hypervolumes[-1] == hypervolumes[-4]
+    assert hypervolumes == sorted(hypervolumes)
+
+
+def test_fit_runs_every_generation_without_patience(make_optimizer, expressions):
+    from modals.modal_language import ModalLanguage
+
+    seeds = [ModalLanguage([e]) for e in expressions[:10]]
+    optimizer = make_optimizer(generations=50)
+    checks = tracking_convergence(optimizer)
+    result = optimizer.fit(seeds, id_start=0, seed=5)
+    assert result["generations"] == 50
+    assert checks == []
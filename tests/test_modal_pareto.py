@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from modals.modal_pareto import (
+    ParetoArchive,
+    hypervolume,
+    non_dominated_indices,
+    non_dominated_ranks,
+)
+
+
+def dominated(x, y, i, among):
+    return any(
+        x[j] <= x[i] and y[j] <= y[i] and (x[j], y[j]) != (x[i], y[i]) for j in among
+    )
+
+
+def brute_force_ranks(x, y):
+    ranks = np.full(len(x), -1)
+    remaining = list(range(len(x)))
+    rank = 0
+    while remaining:
+        front = [i for i in remaining if not dominated(x, y, i, remaining)]
+        ranks[front] = rank
+        remaining = [i for i in remaining if i not in front]
+        rank += 1
+    return ranks
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(0)
+    # few distinct values, so that there are ties and duplicates
+    return rng.integers(0, 8, 200).astype(float), rng.integers(0, 8, 200).astype(float)
+
+
+def test_non_dominated_indices_match_brute_force(points):
+    x, y = points
+    expected = [i for i in range(len(x)) if not dominated(x, y, i, range(len(x)))]
+    assert non_dominated_indices(x, y).tolist() == expected
+
+
+def test_duplicates_of_frontier_points_are_all_non_dominated():
+    x = np.array([0.0, 0.0, 1.0, 1.0])
+    y = np.array([1.0, 1.0, 0.0, 2.0])
+    assert non_dominated_indices(x, y).tolist() == [0, 1, 2]
+
+
+def test_non_dominated_indices_of_nothing():
+    assert len(non_dominated_indices(np.array([]), np.array([]))) == 0
+
+
+def test_non_dominated_ranks_match_brute_force(points):
+    x, y = points
+    assert non_dominated_ranks(x, y).tolist() == brute_force_ranks(x, y).tolist()
+
+
+def test_hypervolume_of_a_staircase():
+    x = np.array([1.0, 2.0, 3.0, 2.5])
+    y = np.array([3.0, 2.0, 1.0, 2.5])
+    # the steps of (1, 3), (2, 2), (3, 1) under the reference (4, 4); (2.5, 2.5) is dominated
+    assert hypervolume(x, y, (4.0, 4.0)) == pytest.approx(1 * 1 + 1 * 2 + 1 * 3)
+
+
+def test_hypervolume_ignores_points_beyond_the_reference():
+    x = np.array([1.0, 5.0])
+    y = np.array([1.0, 0.0])
+    assert hypervolume(x, y, (2.0, 2.0)) == pytest.approx(1.0)
+    assert hypervolume(x[1:], y[1:], (2.0, 2.0)) == 0.0
+
+
+def test_archive_keeps_the_frontier(points):
+    x, y = points
+    archive = ParetoArchive()
+    for i in range(len(x)):
+        archive.insert(i, x[i], y[i])
+    assert sorted(archive.items()) == non_dominated_indices(x, y).tolist()
+    assert archive.hypervolume((9.0, 9.0)) == pytest.approx(
+        hypervolume(x, y, (9.0, 9.0))
+    )
+
+
+def test_archive_rejects_dominated_items():
+    archive = ParetoArchive()
+    assert archive.insert("a", 1.0, 1.0)
+    assert not archive.insert("b", 2.0, 1.0)
+    assert archive.insert("c", 1.0, 1.0)
+    assert archive.insert("d", 0.5, 0.5)
+    assert archive.items() == ["d"]
+
+
+def test_archive_third_objective():
+    archive = ParetoArchive()
+    archive.insert("a", 1.0, 1.0, z=1)
+    archive.insert("b", 2.0, 2.0, z=0)
+    # no better on (x, y) at a lower z
+    assert not archive.insert("c", 2.0, 2.0, z=1)
+    archive.insert("d", 0.0, 0.0, z=0)
+    assert archive.items() == ["d"]
@@ -0,0 +1,53 @@
+import random
+from misc.reservoir import StratifiedReservoir
+
+
+def fill(reservoir, points):
+    for i, point in enumerate(points):
+        reservoir.add(i, point)
+
+
+def test_capacity_and_sparse_cells_kept():
+    reservoir = StratifiedReservoir(10, [(0, 1), (0, 1)], 2, rng=random.Random(0))
+    # many items in one cell, three in another
+    points = [(0.1, 0.1)] * 100 + [(0.9, 0.9)] * 3
+    fill(reservoir, points)
+    assert len(reservoir) == len(reservoir.items()) == 10
+    assert {100, 101, 102} <= set(reservoir.items())
+
+
+def test_same_seed_same_items():
+    points = [(random.Random(i).random(), (i % 7) / 7) for i in range(500)]
+    kept = []
+    for _ in range(2):
+        reservoir = StratifiedReservoir(50, [(0, 1), (0, 1)], 4, rng=random.Random(3))
+        fill(reservoir, points)
+        kept.append(reservoir.items())
+    assert kept[0] == kept[1]
+
+
+def test_uniform_within_a_cell():
+    counts = [0] * 10
+    for seed in range(400):
+        reservoir = StratifiedReservoir(1, [(0, 1)], 1, rng=random.Random(seed))
+        fill(reservoir, [(0.5,)] * 10)
+        counts[reservoir.items()[0]] += 1
+    assert min(counts) > 20 and max(counts) < 65
+
+
+def test_missing_coordinates_share_a_cell():
+    reservoir = StratifiedReservoir(10, [(0, 1), (0, 1)], 4)
+    assert reservoir.cell((None, 0.5)) == reservoir.cell((0.3, None)) == (-1, -1)
+    assert reservoir.cell((2.0, -1.0)) == (3, 0)
+
+
+def test_discard_and_shrink():
+    reservoir = StratifiedReservoir(20, [(0, 1)], 2, rng=random.Random(0))
+    fill(reservoir, [(i / 20,) for i in range(20)])
+    reservoir.discard({0, 1, 2})
+    assert len(reservoir) == 17 and not {0, 1, 2} & set(reservoir.items())
+    reservoir.shrink(6)
+    items = reservoir.items()
+    assert len(items) == 6
+    # three from each half of the line
+    assert sum(i < 10 for i in items) == 3